@@ -0,0 +1,74 @@
+import os
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+def read_text(path):
+    with open(path, "r") as file:
+        return file.read()
+
+def write_text(path, text):
+    dir_path = os.path.dirname(path)
+    if dir_path != "":
+        os.makedirs(dir_path, exist_ok=True)
+    with open(path, "w") as file:
+        file.write(text)
+
+def run_pipeline(pages, render, read_ahead=16, write_behind=16, io_workers=8, read=read_text, write=write_text, on_page=None):
+    return asyncio.run(
+        pipeline(pages, render, read_ahead, write_behind, io_workers, read, write, on_page)
+    )
+
+async def pipeline(pages, render, read_ahead, write_behind, io_workers, read, write, on_page):
+    # Reads run up to read_ahead pages ahead of rendering and writes drain up
+    # to write_behind pages behind it, all on a thread pool, while rendering
+    # stays on the event loop thread in page order
+    loop = asyncio.get_running_loop()
+    reads = asyncio.Queue(maxsize=read_ahead)
+    write_slots = asyncio.Semaphore(write_behind)
+    # Write tasks in page order. A page is reported only once its write has
+    # finished, and a failed write is re-raised when it reaches the front.
+    writes = deque()
+
+    async def report(wait=False):
+        while writes and (wait or writes[0][0].done()):
+            task, from_path, dest_path = writes.popleft()
+            await task
+            if on_page is not None:
+                on_page(from_path, dest_path)
+
+    with ThreadPoolExecutor(max_workers=io_workers) as executor:
+        async def prefetch():
+            for from_path, dest_path in pages:
+                future = loop.run_in_executor(executor, read, from_path)
+                await reads.put((from_path, dest_path, future))
+            await reads.put(None)
+
+        async def flush(dest_path, html):
+            try:
+                await loop.run_in_executor(executor, write, dest_path, html)
+            finally:
+                write_slots.release()
+
+        reader = asyncio.create_task(prefetch())
+        try:
+            while True:
+                item = await reads.get()
+                if item is None:
+                    break
+
+                from_path, dest_path, future = item
+                text = await future
+                html = render(from_path, text)
+
+                await write_slots.acquire()
+                writes.append((asyncio.create_task(flush(dest_path, html)), from_path, dest_path))
+                await report()
+
+            await report(wait=True)
+        finally:
+            reader.cancel()
+            tasks = [task for task, _, _ in writes]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(reader, *tasks, return_exceptions=True)
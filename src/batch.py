@@ -0,0 +1,83 @@
+from concurrent.futures import ProcessPoolExecutor
+from markdown_blocks import markdown_to_html_node
+from blockcache import BlockCache
+from gencontent import extract_title
+
+class BatchRenderer:
+    # Renders many markdown strings with one template, one block cache and,
+    # if workers > 1, one long-lived process pool. Results keep input order.
+    # With metadata=True each result is (html, {"title": ...}) instead.
+    def __init__(self, basepath=None, template=None, workers=1, cache_size=4096, metadata=False):
+        if template is not None:
+            basepath = template.basepath
+        self.basepath = basepath
+        self.template = template
+        self.workers = workers
+        self.metadata = metadata
+        self.block_cache = BlockCache(basepath, cache_size) if cache_size > 0 else None
+        self.executor = None
+        if workers > 1:
+            self.executor = ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=init_worker,
+                initargs=(basepath, template, cache_size, metadata),
+            )
+
+    def render(self, markdowns):
+        if self.executor is None:
+            return [
+                render_one(markdown, self.basepath, self.template, self.block_cache, self.metadata)
+                for markdown in markdowns
+            ]
+
+        markdowns = list(markdowns)
+        # Enough chunks per worker to balance uneven snippets, few enough to
+        # keep pickling overhead low
+        chunksize = max(1, len(markdowns) // (self.workers * 4))
+        return list(self.executor.map(render_worker, markdowns, chunksize=chunksize))
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def render_batch(markdowns, basepath=None, template=None, workers=1, cache_size=4096, metadata=False):
+    with BatchRenderer(basepath, template, workers, cache_size, metadata) as renderer:
+        return renderer.render(markdowns)
+
+def render_one(markdown, basepath, template, block_cache, metadata=False):
+    node = markdown_to_html_node(markdown, block_cache)
+
+    # Snippets often have no "# " heading, so a missing title is allowed here
+    title = None
+    if template is not None or metadata:
+        try:
+            title = extract_title(markdown)
+        except ValueError:
+            pass
+
+    if template is None:
+        html = node.to_html(basepath)
+    else:
+        html = template.render(title or "", node)
+
+    if metadata:
+        return html, {"title": title}
+    return html
+
+worker_state = None
+
+def init_worker(basepath, template, cache_size, metadata=False):
+    global worker_state
+    block_cache = BlockCache(basepath, cache_size) if cache_size > 0 else None
+    worker_state = (basepath, template, block_cache, metadata)
+
+def render_worker(markdown):
+    basepath, template, block_cache, metadata = worker_state
+    return render_one(markdown, basepath, template, block_cache, metadata)
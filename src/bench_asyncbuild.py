@@ -0,0 +1,51 @@
+import os
+import sys
+import time
+import shutil
+import tempfile
+from asyncbuild import read_text, write_text, run_pipeline
+from corpus import write_corpus
+from gencontent import extract_title
+from markdown_blocks import markdown_to_html_node
+from template import Template
+
+def slow(func, latency):
+    # Simulates a network-mounted volume: every file operation waits first
+    def call(*args):
+        time.sleep(latency)
+        return func(*args)
+    return call
+
+def main():
+    pages_count = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    latency = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.005
+
+    work_dir = tempfile.mkdtemp(prefix="mdx-async-")
+    try:
+        content_dir = os.path.join(work_dir, "content")
+        paths = write_corpus(content_dir, pages=pages_count, page_size=10)
+        pages = [(path, os.path.join(work_dir, "out", f"{i}.html")) for i, path in enumerate(paths)]
+        template = Template("<title>{{ Title }}</title>{{ Content }}")
+        read = slow(read_text, latency)
+        write = slow(write_text, latency)
+
+        def render(from_path, mdx):
+            return template.render(extract_title(mdx), markdown_to_html_node(mdx))
+
+        start = time.perf_counter()
+        for from_path, dest_path in pages:
+            write(dest_path, render(from_path, read(from_path)))
+        serial = time.perf_counter() - start
+
+        start = time.perf_counter()
+        run_pipeline(pages, render, read=read, write=write)
+        pipelined = time.perf_counter() - start
+    finally:
+        shutil.rmtree(work_dir)
+
+    print(f"{pages_count} pages, {latency * 1000:.1f} ms per file operation")
+    print(f"serial    {serial:8.3f} s")
+    print(f"pipelined {pipelined:8.3f} s  ({serial / pipelined:.1f}x)")
+
+if __name__ == "__main__":
+    main()
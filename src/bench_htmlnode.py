@@ -0,0 +1,77 @@
+import sys
+import timeit
+import htmlnode
+from htmlnode import LeafNode, rewrite_url, URL_PROPS
+from corpus import synthetic_page
+from markdown_blocks import markdown_to_html_node
+
+def unescaped_props(node, basepath):
+    # props_to_html as it was before attribute escaping and caching
+    if node.props == None:
+        return ""
+
+    rewrite = basepath is not None and node.tag in URL_PROPS
+    attrs = []
+    for prop, val in node.props.items():
+        if rewrite:
+            val = rewrite_url(node.tag, prop, val, basepath)
+        attrs.append(f"{prop}='{val}'")
+    return " ".join(attrs)
+
+def unescaped_render(node, write, basepath):
+    # The render path as it was before text and attribute escaping
+    attr = unescaped_props(node, basepath)
+    open_tag = f"<{node.tag} {attr}>" if attr != "" else f"<{node.tag}>"
+    if isinstance(node, LeafNode):
+        if node.tag == None:
+            write(node.value)
+        else:
+            write(f"{open_tag}{node.value}</{node.tag}>")
+        return
+
+    write(open_tag)
+    for child in node.children:
+        unescaped_render(child, write, basepath)
+    write(f"</{node.tag}>")
+
+def unescaped_to_html(node, basepath):
+    parts = []
+    unescaped_render(node, parts.append, basepath)
+    return "".join(parts)
+
+def escaped_to_html(node, basepath):
+    # Fresh parts list every time, like the first render of a new page
+    parts = []
+    node.render(parts.append, basepath)
+    return "".join(parts)
+
+def bench(link_density, pages, number):
+    trees = [
+        markdown_to_html_node(synthetic_page(i, 40, link_density, 8, 0, pages))
+        for i in range(pages)
+    ]
+
+    def before():
+        for tree in trees:
+            unescaped_to_html(tree, "/site/")
+
+    def after():
+        # Each run starts cold, as a fresh build would
+        htmlnode.attr_cache.clear()
+        for tree in trees:
+            escaped_to_html(tree, "/site/")
+
+    unescaped = min(timeit.repeat(before, number=number, repeat=5))
+    escaped = min(timeit.repeat(after, number=number, repeat=5))
+    print(
+        f"links {link_density:4.2f}  unescaped {unescaped / number * 1000:9.3f} ms"
+        f"  escaped {escaped / number * 1000:9.3f} ms  ratio {escaped / unescaped:5.2f}"
+    )
+
+def main():
+    densities = [float(arg) for arg in sys.argv[1:]] or [0.1, 0.3, 0.6]
+    for link_density in densities:
+        bench(link_density, 200, 3)
+
+if __name__ == "__main__":
+    main()
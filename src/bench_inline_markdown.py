@@ -0,0 +1,46 @@
+import sys
+import timeit
+from textnode import TextNode, TextType
+from inline_markdown import (
+    split_nodes_delimiter,
+    split_nodes_image,
+    split_nodes_links,
+    text_to_textnodes,
+)
+
+def cascading_text_to_textnodes(text):
+    # The five-pass pipeline text_to_textnodes used before the single scan
+    nodes = split_nodes_image([TextNode(text, TextType.TEXT)])
+    nodes = split_nodes_links(nodes)
+    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
+    return nodes
+
+def link_dense_paragraph(links):
+    parts = []
+    for i in range(links):
+        parts.append(f"see [page {i}](/docs/page-{i}) and **bold {i}** or ")
+        if i % 5 == 0:
+            parts.append(f"![figure {i}](/images/fig-{i}.png) with `code` ")
+    return "".join(parts)
+
+def bench(links, number):
+    text = link_dense_paragraph(links)
+    if cascading_text_to_textnodes(text) != text_to_textnodes(text):
+        raise Exception("tokenizers disagree")
+
+    before = min(timeit.repeat(lambda: cascading_text_to_textnodes(text), number=number, repeat=3))
+    after = min(timeit.repeat(lambda: text_to_textnodes(text), number=number, repeat=3))
+    print(
+        f"{links:>6} links  cascade {before / number * 1000:9.3f} ms"
+        f"  single-scan {after / number * 1000:9.3f} ms  speedup {before / after:6.1f}x"
+    )
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10, 100, 1000, 5000]
+    for links in sizes:
+        bench(links, max(1, 2000 // links))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import re
+import sys
+import time
+import random
+from markdown_blocks import BlockType, block_to_block_type
+
+def legacy_is_ordered_list_block(text):
+    if not re.fullmatch(r"^(\d+)\. .*(?:\n\d+\. .*)*$", text):
+        return False
+
+    nums = []
+    for line in text.split("\n"):
+        m = re.match(r"^(\d+)\. ", line)
+        if not m:
+            return False
+        nums.append(int(m.group(1)))
+
+    return nums[0] == 1 and nums == list(range(1, len(nums) + 1))
+
+def legacy_block_to_block_type(block):
+    # The classifier as it was before first-character dispatch
+    if re.match(r"^#{1,6}\s.*$", block):
+        return BlockType.HEADING
+    if re.match(r"^```(?!`)[\s\S]*?(?<!`)```$", block):
+        return BlockType.CODE
+    if block.startswith(">"):
+        return BlockType.QUOTE
+    if re.match(r"^- .*(\n- .*)*$", block):
+        return BlockType.UNORDERED_LIST
+    if legacy_is_ordered_list_block(block):
+        return BlockType.ORDERED_LIST
+    return BlockType.PARAGRAPH
+
+def make_corpus(count, seed=0):
+    rng = random.Random(seed)
+    makers = [
+        lambda i: "#" * rng.randint(1, 6) + f" Heading {i}",
+        lambda i: f"```\nprint({i})\nreturn {i}\n```",
+        lambda i: f"> quoted {i}\n> more",
+        lambda i: "\n".join(f"- item {n}" for n in range(rng.randint(1, 12))),
+        lambda i: "\n".join(f"{n + 1}. step {n}" for n in range(rng.randint(1, 12))),
+        lambda i: f"A paragraph {i} with **bold** text\nand a second line.",
+        lambda i: f"1. almost a list\n3. but not {i}",
+    ]
+    return [rng.choice(makers)(i) for i in range(count)]
+
+def blocks_per_second(classify, corpus, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for block in corpus:
+            classify(block)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return len(corpus) / best
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    corpus = make_corpus(count)
+    for block in corpus:
+        if legacy_block_to_block_type(block) != block_to_block_type(block):
+            raise Exception(f"classifiers disagree on {block!r}")
+
+    before = blocks_per_second(legacy_block_to_block_type, corpus)
+    after = blocks_per_second(block_to_block_type, corpus)
+    print(f"{count} blocks")
+    print(f"before {before:12,.0f} blocks/s")
+    print(f"after  {after:12,.0f} blocks/s  ({after / before:.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import sys
+import tracemalloc
+from markdown_blocks import markdown_to_html_node
+
+def synthetic_markdown(size_mb):
+    section = (
+        "## Section {i}\n\n"
+        "Some **bold** text with a [link {i}](/docs/{i}) and `inline code` and _emphasis_.\n"
+        "A second line ![figure](/images/{i}.png) closes the paragraph.\n\n"
+        "- first item {i}\n- second [item](/items/{i})\n- third item\n\n"
+        "1. one\n2. two\n3. three\n\n"
+        "> quoted {i}\n> text\n\n"
+        "```\ncode sample {i}\n```\n\n"
+    )
+    target = int(size_mb * 1024 * 1024)
+    parts = ["# Memory benchmark\n\n"]
+    size = len(parts[0])
+    i = 0
+    while size < target:
+        part = section.format(i=i)
+        parts.append(part)
+        size += len(part)
+        i += 1
+    return "".join(parts)
+
+def bench(size_mb):
+    markdown = synthetic_markdown(size_mb)
+    source_mb = len(markdown.encode("utf-8")) / (1024 * 1024)
+
+    tracemalloc.start()
+    node = markdown_to_html_node(markdown)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del node
+
+    print(
+        f"{source_mb:6.2f} MB markdown  peak {peak / (1024 * 1024):8.2f} MB"
+        f" ({peak / (1024 * 1024) / source_mb:5.1f} MB/MB)"
+        f"  tree {retained / (1024 * 1024):8.2f} MB"
+        f" ({retained / (1024 * 1024) / source_mb:5.1f} MB/MB)"
+    )
+
+def main():
+    sizes = [float(arg) for arg in sys.argv[1:]] or [1, 5]
+    for size_mb in sizes:
+        bench(size_mb)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+from corpus import write_corpus
+from inline_markdown import text_to_textnodes
+from markdown_blocks import BlockType, markdown_to_blocks, block_to_block_type, block_to_html_node
+from htmlnode import ParentNode
+from template import Template
+
+STAGES = ("read", "split", "classify", "tokenize", "convert", "render", "template", "write")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="time each stage of the build on a synthetic corpus")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--page-size", type=int, default=20, help="blocks per page")
+    parser.add_argument("--link-density", type=float, default=0.2, help="fraction of words that are links")
+    parser.add_argument("--list-length", type=int, default=5)
+    parser.add_argument("--code-lines", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="report the fastest of this many runs")
+    parser.add_argument("--template", default="./template.html")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    return parser.parse_args(argv)
+
+def inline_texts(block, block_type):
+    # The text each block type hands to text_to_textnodes
+    lines = block.split("\n")
+    if block_type == BlockType.PARAGRAPH:
+        return [" ".join(lines)]
+    if block_type == BlockType.HEADING:
+        return [block.lstrip("#")[1:]]
+    if block_type == BlockType.UNORDERED_LIST:
+        return [line[2:] for line in lines]
+    if block_type == BlockType.ORDERED_LIST:
+        return [line[3:] for line in lines]
+    if block_type == BlockType.QUOTE:
+        return [" ".join(line[2:].strip() for line in lines)]
+    return []
+
+def run_once(paths, template, out_dir):
+    timings = dict.fromkeys(STAGES, 0.0)
+    clock = time.perf_counter
+
+    start = clock()
+    documents = []
+    for path in paths:
+        with open(path, "r") as file:
+            documents.append(file.read())
+    timings["read"] = clock() - start
+
+    start = clock()
+    pages = [markdown_to_blocks(document) for document in documents]
+    timings["split"] = clock() - start
+
+    start = clock()
+    types = [[block_to_block_type(block) for block in blocks] for blocks in pages]
+    timings["classify"] = clock() - start
+
+    texts = [
+        text
+        for blocks, block_types in zip(pages, types)
+        for block, block_type in zip(blocks, block_types)
+        for text in inline_texts(block, block_type)
+    ]
+    start = clock()
+    for text in texts:
+        text_to_textnodes(text)
+    timings["tokenize"] = clock() - start
+
+    start = clock()
+    nodes = [ParentNode("div", [block_to_html_node(block) for block in blocks]) for blocks in pages]
+    timings["convert"] = clock() - start
+
+    start = clock()
+    contents = [node.to_html(template.basepath) for node in nodes]
+    timings["render"] = clock() - start
+
+    # Substitution only: the content strings were rendered above
+    start = clock()
+    html_pages = [template.fill(f"Page {i}", content) for i, content in enumerate(contents)]
+    timings["template"] = clock() - start
+
+    start = clock()
+    for i, html in enumerate(html_pages):
+        with open(os.path.join(out_dir, f"page-{i}.html"), "w") as file:
+            file.write(html)
+    timings["write"] = clock() - start
+
+    return timings
+
+def run(args):
+    work_dir = tempfile.mkdtemp(prefix="mdx-bench-")
+    try:
+        content_dir = os.path.join(work_dir, "content")
+        out_dir = os.path.join(work_dir, "out")
+        os.mkdir(out_dir)
+        paths = write_corpus(
+            content_dir,
+            pages=args.pages,
+            page_size=args.page_size,
+            link_density=args.link_density,
+            list_length=args.list_length,
+            code_lines=args.code_lines,
+            seed=args.seed,
+        )
+        corpus_bytes = sum(os.path.getsize(path) for path in paths)
+        template = Template.load(args.template, "/")
+
+        best = None
+        for _ in range(args.repeat):
+            timings = run_once(paths, template, out_dir)
+            if best is None:
+                best = timings
+            else:
+                best = {stage: min(best[stage], timings[stage]) for stage in STAGES}
+    finally:
+        shutil.rmtree(work_dir)
+
+    megabytes = corpus_bytes / (1024 * 1024)
+    return {
+        "config": {
+            "pages": args.pages,
+            "page_size": args.page_size,
+            "link_density": args.link_density,
+            "list_length": args.list_length,
+            "code_lines": args.code_lines,
+            "seed": args.seed,
+            "repeat": args.repeat,
+        },
+        "python": platform.python_version(),
+        "corpus_bytes": corpus_bytes,
+        "stages": {
+            stage: {
+                "seconds": round(seconds, 6),
+                "ms_per_page": round(seconds * 1000 / max(args.pages, 1), 4),
+                "mb_per_second": round(megabytes / seconds, 2) if seconds > 0 else None,
+            }
+            for stage, seconds in best.items()
+        },
+    }
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = run(args)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(text + "\n")
+    else:
+        sys.stdout.write(text + "\n")
+
+if __name__ == "__main__":
+    main()
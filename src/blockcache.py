@@ -0,0 +1,115 @@
+import os
+import json
+import hashlib
+from collections import OrderedDict
+
+# Bumped whenever the shape of a cached entry changes
+CACHE_VERSION = 3
+
+class BlockCache:
+    # Maps a block's content hash to its rendered HTML and the (tag, url)
+    # pairs it contains. Entries are only valid for the basepath they were
+    # rendered with.
+    def __init__(self, basepath=None, maxsize=4096, path=None):
+        self.basepath = basepath
+        self.maxsize = maxsize
+        self.path = path
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        # Entries put since the last take_changes(), while tracked
+        self.added = None
+        if path is not None:
+            self.load()
+
+    def key(self, block):
+        return hashlib.blake2b(block.encode("utf-8"), digest_size=16).hexdigest()
+
+    def get(self, block):
+        key = self.key(block)
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, block, entry):
+        key = self.key(block)
+        if self.added is not None:
+            self.added[key] = entry
+        self.store(key, entry)
+
+    def store(self, key, entry):
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def track_changes(self):
+        # For a worker process's copy: count from zero and remember new
+        # entries, so take_changes() can send them back to the parent
+        self.added = {}
+        self.hits = 0
+        self.misses = 0
+
+    def take_changes(self):
+        changes = (list(self.added.items()), self.hits, self.misses)
+        self.added = {}
+        self.hits = 0
+        self.misses = 0
+        return changes
+
+    def merge_changes(self, changes):
+        entries, hits, misses = changes
+        for key, entry in entries:
+            self.store(key, entry)
+        self.hits += hits
+        self.misses += misses
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, "r") as file:
+            try:
+                data = json.load(file)
+            except ValueError:
+                return
+
+        if not isinstance(data, dict) or data.get("version") != CACHE_VERSION:
+            return
+
+        if data.get("basepath") != self.basepath:
+            return
+
+        for key, entry in data.get("entries", [])[-self.maxsize:]:
+            self.entries[key] = entry
+
+    def save(self):
+        if self.path is None:
+            return
+
+        with open(self.path, "w") as file:
+            json.dump(
+                {
+                    "version": CACHE_VERSION,
+                    "basepath": self.basepath,
+                    "entries": list(self.entries.items()),
+                },
+                file,
+            )
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "size": len(self.entries),
+        }
+
+    def __repr__(self):
+        return f"BlockCache({len(self.entries)}/{self.maxsize}, hits={self.hits}, misses={self.misses})"
@@ -1,15 +1,97 @@
 import os
 import shutil
+import fcntl
+from manifest import hash_file
 
-def copy_files_recursive(copyFrom, copyTo):
+LINK_MODES = ("copy", "hardlink", "reflink")
+COMPARE_MODES = ("stat", "hash")
+
+# ioctl request number for FICLONE on Linux (copy-on-write clone)
+FICLONE = 0x40049409
+
+def copy_files_recursive(copyFrom, copyTo, manifest=None, link="copy", compare="stat", shard=None):
+    if link not in LINK_MODES:
+        raise ValueError(f"invalid link mode: {link}")
+    if compare not in COMPARE_MODES:
+        raise ValueError(f"invalid compare mode: {compare}")
+
+    stats = {"copied": 0, "linked": 0, "skipped": 0, "removed": 0}
+    copy_tree(copyFrom, copyTo, manifest, link, compare, copyFrom, stats, shard)
+    if manifest is not None:
+        stats["removed"] = len(manifest.prune("static:"))
+
+    print(
+        f"static: {stats['copied']} copied, {stats['linked']} linked, "
+        f"{stats['skipped']} unchanged, {stats['removed']} removed"
+    )
+    return stats
+
+def copy_tree(copyFrom, copyTo, manifest, link, compare, root, stats, shard=None):
     items = os.listdir(copyFrom)
     for item in items:
         item_path = os.path.join(copyFrom, item)
+        dst = os.path.join(copyTo, item)
         if os.path.isfile(item_path):
-            shutil.copy(item_path, copyTo)
-            print("copied", item_path, "to", copyTo)
+            if shard is not None and not shard.owns(os.path.relpath(item_path, root)):
+                continue
+
+            if is_unchanged(item_path, dst, manifest, compare, root):
+                stats["skipped"] += 1
+                continue
+
+            if place_file(item_path, dst, link):
+                stats["linked"] += 1
+            else:
+                stats["copied"] += 1
         else:
-            dst = os.path.join(copyTo, item)
-            os.mkdir(dst)
-            copy_files_recursive(item_path, dst)
- 
+            os.makedirs(dst, exist_ok=True)
+            copy_tree(item_path, dst, manifest, link, compare, root, stats, shard)
+
+def is_unchanged(src, dst, manifest, compare, root):
+    key = "static:" + os.path.relpath(src, root)
+    if compare == "hash" and manifest is not None:
+        return manifest.is_unchanged(key, src, dst)
+
+    if manifest is not None:
+        manifest.track(key, dst)
+
+    try:
+        dst_stat = os.stat(dst)
+    except FileNotFoundError:
+        return False
+
+    src_stat = os.stat(src)
+    if src_stat.st_size != dst_stat.st_size:
+        return False
+
+    if compare == "hash":
+        return hash_file(src) == hash_file(dst)
+
+    # copy2, hardlinks and clones all carry the source mtime over
+    return src_stat.st_mtime_ns == dst_stat.st_mtime_ns
+
+def place_file(src, dst, link):
+    if os.path.lexists(dst):
+        os.remove(dst)
+
+    if link == "hardlink":
+        try:
+            os.link(src, dst)
+            return True
+        except OSError:
+            pass
+    elif link == "reflink":
+        try:
+            reflink_file(src, dst)
+            return True
+        except OSError:
+            if os.path.lexists(dst):
+                os.remove(dst)
+
+    shutil.copy2(src, dst)
+    return False
+
+def reflink_file(src, dst):
+    with open(src, "rb") as src_file, open(dst, "wb") as dst_file:
+        fcntl.ioctl(dst_file.fileno(), FICLONE, src_file.fileno())
+    shutil.copystat(src, dst)
@@ -0,0 +1,65 @@
+import os
+import random
+
+WORDS = (
+    "hobbit ring shire elf dwarf wizard river mountain forest road tower "
+    "king sword song light shadow stone valley bridge star tale"
+).split()
+
+def synthetic_page(
+    index,
+    page_size=20,
+    link_density=0.2,
+    list_length=5,
+    code_lines=8,
+    pages=1,
+    seed=0,
+):
+    # The same arguments always produce the same page
+    rng = random.Random(f"{seed}:{index}")
+    blocks = [f"# Page {index}"]
+    for n in range(page_size):
+        kind = n % 5
+        if kind == 0:
+            blocks.append(f"## Section {n}")
+        elif kind == 1:
+            blocks.append("\n".join(f"- {inline_text(rng, 6, link_density, pages)}" for _ in range(list_length)))
+        elif kind == 2:
+            blocks.append("\n".join(f"{i + 1}. {inline_text(rng, 6, link_density, pages)}" for i in range(list_length)))
+        elif kind == 3 and code_lines > 0:
+            lines = [f"print({rng.choice(WORDS)!r}, {i})" for i in range(code_lines)]
+            blocks.append("```\n" + "\n".join(lines) + "\n```")
+        else:
+            blocks.append("\n".join(inline_text(rng, 14, link_density, pages) for _ in range(3)))
+
+    return "\n\n".join(blocks) + "\n"
+
+def inline_text(rng, words, link_density, pages):
+    parts = []
+    for _ in range(words):
+        word = rng.choice(WORDS)
+        roll = rng.random()
+        if roll < link_density:
+            parts.append(f"[{word}](/page-{rng.randrange(max(pages, 1))})")
+        elif roll < link_density + 0.05:
+            parts.append(f"![{word}](/images/{word}.png)")
+        elif roll < link_density + 0.12:
+            parts.append(f"**{word}**")
+        elif roll < link_density + 0.17:
+            parts.append(f"_{word}_")
+        elif roll < link_density + 0.22:
+            parts.append(f"`{word}`")
+        else:
+            parts.append(word)
+    return " ".join(parts)
+
+def write_corpus(dir_path, pages=100, **options):
+    paths = []
+    for index in range(pages):
+        page_dir = os.path.join(dir_path, f"page-{index}")
+        os.makedirs(page_dir, exist_ok=True)
+        path = os.path.join(page_dir, "index.md")
+        with open(path, "w") as file:
+            file.write(synthetic_page(index, pages=pages, **options))
+        paths.append(path)
+    return paths
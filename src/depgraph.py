@@ -0,0 +1,102 @@
+import os
+import json
+from urllib.parse import urlsplit
+from template import Template
+
+DEPGRAPH_NAME = ".depgraph.json"
+
+def url_key(url):
+    # "/blog/tom/", "/blog/tom/index.html#x" and "/blog/tom" are one target
+    path = urlsplit(url).path
+    if path.endswith("/index.html"):
+        path = path[:-len("index.html")]
+    if len(path) > 1:
+        path = path.rstrip("/")
+    return "url:" + path
+
+def file_key(path):
+    return "file:" + os.path.normpath(path)
+
+class DependencyGraph:
+    # Output page -> the inputs it was rendered from, plus the reverse index
+    # so the outputs affected by a change are found without a full scan
+    def __init__(self, path=None):
+        self.path = path
+        self.inputs = {}
+        self.dependents = {}
+
+    @classmethod
+    def load(cls, dir_path):
+        graph = cls(os.path.join(dir_path, DEPGRAPH_NAME))
+        if not os.path.exists(graph.path):
+            return graph
+
+        with open(graph.path, "r") as file:
+            try:
+                data = json.load(file)
+            except ValueError:
+                return graph
+
+        if isinstance(data, dict):
+            for output, inputs in data.items():
+                graph.record(output, inputs)
+        return graph
+
+    def record(self, output, inputs):
+        self.remove(output)
+        inputs = set(inputs)
+        self.inputs[output] = inputs
+        for key in inputs:
+            self.dependents.setdefault(key, set()).add(output)
+
+    def record_page(self, page, shared_keys=()):
+        keys = [file_key(page["source"])]
+        keys.extend(shared_keys)
+        keys.extend(url_key(url) for url in page["links"])
+        keys.extend(url_key(url) for url in page["images"])
+        self.record(os.path.normpath(page["output"]), keys)
+
+    def remove(self, output):
+        for key in self.inputs.pop(output, ()):
+            outputs = self.dependents.get(key)
+            if outputs is not None:
+                outputs.discard(output)
+                if not outputs:
+                    del self.dependents[key]
+
+    def __contains__(self, output):
+        return os.path.normpath(output) in self.inputs
+
+    def retain(self, outputs):
+        outputs = {os.path.normpath(output) for output in outputs}
+        for output in [output for output in self.inputs if output not in outputs]:
+            self.remove(output)
+
+    def affected(self, keys):
+        found = set()
+        for key in keys:
+            found.update(self.dependents.get(key, ()))
+        return found
+
+    def save(self):
+        with open(self.path, "w") as file:
+            json.dump({output: sorted(inputs) for output, inputs in sorted(self.inputs.items())}, file, indent=1)
+
+def template_keys(template_path):
+    # Every page depends on the template and on whatever the template links
+    # to itself, such as the stylesheet
+    template = Template.load(template_path)
+    return [file_key(template_path)] + [url_key(url) for url in template.urls]
+
+def changed_keys(path, dir_path_content, dir_path_static):
+    # The graph keys a changed source file can invalidate: the file itself,
+    # and the site URL it is served at when it is a page or a static file
+    keys = [file_key(path)]
+    rel_content = os.path.relpath(path, dir_path_content)
+    rel_static = os.path.relpath(path, dir_path_static)
+    if not rel_content.startswith(".."):
+        page_dir = os.path.dirname(rel_content).replace(os.sep, "/")
+        keys.append(url_key("/" + page_dir if page_dir else "/"))
+    elif not rel_static.startswith(".."):
+        keys.append(url_key("/" + rel_static.replace(os.sep, "/")))
+    return keys
@@ -0,0 +1,141 @@
+import io
+import os
+import itertools
+import json
+
+METADATA_NAME = ".metadata.json"
+
+def read_front_matter(lines):
+    # A "---" first line opens the front matter and the next "---" line
+    # closes it. Returns (meta, characters consumed), or ({}, 0) when the
+    # document has none, so an unclosed fence, or one around lines that
+    # are not "key: value" pairs, is left to the markdown.
+    lines = iter(lines)
+    first = next(lines, "")
+    if first.rstrip("\r\n") != "---":
+        return {}, 0
+
+    consumed = len(first)
+    body = []
+    for line in lines:
+        consumed += len(line)
+        if line.rstrip("\r\n") == "---":
+            try:
+                return parse_front_matter(body), consumed
+            except ValueError:
+                return {}, 0
+        body.append(line)
+
+    return {}, 0
+
+def split_front_matter(markdown):
+    if not markdown.startswith("---"):
+        return {}, markdown
+
+    meta, consumed = read_front_matter(io.StringIO(markdown))
+    return meta, markdown[consumed:]
+
+def parse_front_matter(lines):
+    # "key: value" lines; a value may be quoted or a [comma, separated] list
+    meta = {}
+    for line in lines:
+        line = line.strip()
+        if line == "" or line.startswith("#"):
+            continue
+
+        key, sep, value = line.partition(":")
+        if not sep or key.strip() == "":
+            raise ValueError(f"invalid front matter line: {line!r}")
+        meta[key.strip()] = parse_value(value.strip())
+
+    return meta
+
+def parse_value(value):
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+        return value[1:-1]
+
+    if value.startswith("[") and value.endswith("]"):
+        return [parse_value(item.strip()) for item in value[1:-1].split(",") if item.strip() != ""]
+
+    return value
+
+class MetadataCache:
+    # Front matter and title per content file, valid while the file's mtime
+    # and size are unchanged, so listings, sitemaps and feeds never have to
+    # reopen pages that did not change
+    def __init__(self, path=None, entries=None):
+        self.path = path
+        self.entries = entries if entries is not None else {}
+
+    @classmethod
+    def load(cls, dir_path):
+        path = os.path.join(dir_path, METADATA_NAME)
+        if not os.path.exists(path):
+            return cls(path)
+
+        with open(path, "r") as file:
+            try:
+                entries = json.load(file)
+            except ValueError:
+                return cls(path)
+
+        if not isinstance(entries, dict):
+            return cls(path)
+
+        return cls(path, entries)
+
+    def get(self, source_path):
+        entry = self.entries.get(source_path)
+        if entry is None:
+            return None
+
+        try:
+            stat = os.stat(source_path)
+        except FileNotFoundError:
+            return None
+
+        if entry["mtime_ns"] != stat.st_mtime_ns or entry["size"] != stat.st_size:
+            return None
+        return entry
+
+    def put(self, source_path, title, meta):
+        stat = os.stat(source_path)
+        entry = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "title": title, "meta": meta}
+        self.entries[source_path] = entry
+        return entry
+
+    def lookup(self, source_path):
+        # Cached metadata, or the front matter and title read from the top
+        # of the file; the rest of the page is not parsed
+        entry = self.get(source_path)
+        if entry is not None:
+            return entry
+
+        with open(source_path, "r") as file:
+            lines = iter(file)
+            first = next(lines, "")
+            meta, consumed = read_front_matter(itertools.chain([first], lines))
+            if consumed == 0 and first.rstrip("\r\n") == "---":
+                # Unclosed or invalid front matter is markdown after all
+                file.seek(0)
+                lines = iter(file)
+            elif consumed == 0:
+                lines = itertools.chain([first], lines)
+            title = find_heading(lines)
+        return self.put(source_path, title, meta)
+
+    def retain(self, source_paths):
+        source_paths = set(source_paths)
+        for source_path in [path for path in self.entries if path not in source_paths]:
+            del self.entries[source_path]
+
+    def save(self):
+        with open(self.path, "w") as file:
+            json.dump(self.entries, file, indent=1, sort_keys=True)
+
+def find_heading(lines):
+    # find_title without the error, for pages listed but never rendered
+    for line in lines:
+        if line.startswith("# "):
+            return line[2:].strip()
+    return None
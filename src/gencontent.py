@@ -1,46 +1,397 @@
 import os
-from markdown_blocks import markdown_to_html_node
+import time
+import profiling
+from concurrent.futures import ProcessPoolExecutor
+from markdown_blocks import markdown_to_html_node, blocks_to_html_node, iter_file_blocks
+from manifest import hash_file
+from template import Template
+from asyncbuild import run_pipeline, read_text, write_text
+from depgraph import template_keys
+from searchindex import PageTerms, page_terms
+from frontmatter import split_front_matter, read_front_matter, MetadataCache
 
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, basepath):
-    items = os.listdir(dir_path_content)
+# Pages at least this large are parsed block by block instead of in memory
+STREAM_THRESHOLD = 8 << 20
+
+class PageError(Exception):
+    pass
+
+def generate_pages_recursive(
+    dir_path_content,
+    template_path,
+    dest_dir_path,
+    basepath,
+    manifest=None,
+    workers=1,
+    block_cache=None,
+    io_workers=0,
+    *,
+    depgraph=None,
+    shard=None,
+    link_index=None,
+    search_index=None,
+    metadata_cache=None,
+    site_index=None,
+    changed=None,
+):
+    pages = collect_pages(dir_path_content, dest_dir_path)
+    if shard is not None:
+        pages = [
+            (from_path, dest_path)
+            for from_path, dest_path in pages
+            if shard.owns(os.path.relpath(dest_path, dest_dir_path))
+        ]
+    all_pages = pages
+    all_outputs = [dest_path for _, dest_path in pages]
+    # Indexes that only learn about pages as they render
+    trackers = [tracker for tracker in (depgraph, link_index, search_index) if tracker is not None]
+
+    if manifest is not None:
+        # A new template or basepath changes every page, so skip nothing
+        template_digest = hash_file(template_path) + ":" + basepath
+        force = not manifest.matches("template", template_digest)
+        # A deleted source may have shared its output with sources that are
+        # still here, which then have to render it without the deleted one
+        sources = {"content:" + os.path.relpath(from_path, dir_path_content) for from_path, _ in pages}
+        stale = {
+            entry.get("output")
+            for key, entry in manifest.entries.items()
+            if key.startswith("content:") and key not in sources
+        }
+        if changed is not None and depgraph is not None and not force:
+            # The caller already knows which inputs changed (graph keys, as
+            # from changed_keys), so only the pages recorded as depending on
+            # them, and pages the graph has never seen, are hashed and rendered
+            affected = depgraph.affected(changed)
+            for from_path, dest_path in pages:
+                key = "content:" + os.path.relpath(from_path, dir_path_content)
+                if os.path.normpath(dest_path) in affected or any(dest_path not in tracker for tracker in trackers):
+                    manifest.is_unchanged(key, from_path, dest_path)
+                    stale.add(dest_path)
+                else:
+                    manifest.keep(key)
+        else:
+            for from_path, dest_path in pages:
+                unchanged = manifest.is_unchanged(
+                    "content:" + os.path.relpath(from_path, dir_path_content),
+                    from_path,
+                    dest_path,
+                )
+                if not unchanged or force or any(dest_path not in tracker for tracker in trackers):
+                    stale.add(dest_path)
+        # Every file in a directory renders to its index.html and the last
+        # one walked wins, so they are re-rendered together or not at all
+        pages = [(from_path, dest_path) for from_path, dest_path in pages if dest_path in stale]
+
+    index_text = search_index is not None
+    infos = []
+    # Every path renders pages in walk order, so pages an incremental build
+    # skipped can be slotted into the sitemap and feed from the metadata
+    # cache between the ones that rendered
+    unlisted = iter(all_pages)
+    listing_cache = metadata_cache if metadata_cache is not None else MetadataCache()
+    # Sources sharing an output get one entry, from the source walked last,
+    # whose render is the one left in the output
+    listed_source = {dest_path: from_path for from_path, dest_path in all_pages} if site_index is not None else None
+
+    def list_skipped(until=None):
+        for from_path, dest_path in unlisted:
+            if from_path == until:
+                return
+            if listed_source[dest_path] != from_path:
+                continue
+            entry = listing_cache.lookup(from_path)
+            site_index.add(dest_path, from_path, entry["title"], entry["meta"])
+
+    def on_info(info):
+        # Search terms are merged and dropped page by page rather than held
+        # for the whole site
+        if search_index is not None:
+            search_index.add_page(info)
+        if metadata_cache is not None:
+            metadata_cache.put(info["source"], info["title"], info["meta"])
+        if site_index is not None:
+            list_skipped(info["source"])
+            if listed_source[info["output"]] == info["source"]:
+                site_index.add(info["output"], info["source"], info["title"], info["meta"])
+        infos.append(info)
+
+    try:
+        if workers > 1 and len(pages) > 1:
+            generate_pages_parallel(pages, template_path, basepath, workers, block_cache, index_text, on_info)
+        elif io_workers > 0:
+            generate_pages_async(pages, template_path, basepath, io_workers, block_cache, index_text, on_info)
+        else:
+            template = Template.load(template_path, basepath)
+            for from_path, dest_path in pages:
+                on_info(generate_page(from_path, template_path, dest_path, basepath, template, block_cache, index_text))
+
+        if site_index is not None:
+            list_skipped()
+            site_index.close()
+    except BaseException:
+        if site_index is not None:
+            site_index.abort()
+        raise
+
+    if manifest is not None:
+        manifest.prune("content:")
+
+    if depgraph is not None:
+        # Pages skipped by an incremental build keep their recorded edges
+        shared_keys = template_keys(template_path)
+        for info in infos:
+            depgraph.record_page(info, shared_keys)
+        depgraph.retain(all_outputs)
+
+    if link_index is not None:
+        for info in infos:
+            link_index.record(info)
+        link_index.retain(all_outputs)
+
+    if search_index is not None:
+        search_index.retain(all_outputs)
+
+    if metadata_cache is not None:
+        metadata_cache.retain(from_path for from_path, _ in all_pages)
+
+    return infos
+
+def collect_pages(dir_path_content, dest_dir_path):
+    pages = []
+    # Sorted so every build walks, and lists, pages in the same order
+    items = sorted(os.listdir(dir_path_content))
     for item in items:
         item_path = os.path.join(dir_path_content, item)
         if os.path.isfile(item_path):
-            generate_page(item_path, template_path, os.path.join(dest_dir_path, "index.html"), basepath)
+            pages.append((item_path, os.path.join(dest_dir_path, "index.html")))
         else:
             dest_path = os.path.join(dest_dir_path, item)
             os.makedirs(dest_path, exist_ok=True)
-            generate_pages_recursive(item_path, template_path, dest_path, basepath)
+            pages.extend(collect_pages(item_path, dest_path))
 
-def generate_page(from_path, template_path, dest_path, basepath):
-    print(f" * {from_path} {template_path} -> {dest_path}")
+    return pages
 
-    with open(from_path, "r") as file:
-        mdx = file.read()
+def generate_pages_parallel(pages, template_path, basepath, workers, block_cache=None, index_text=False, on_info=None):
+    jobs = [(from_path, template_path, dest_path, basepath, index_text) for from_path, dest_path in pages]
+    # Small chunks keep every worker busy when page sizes vary a lot
+    chunksize = max(1, len(jobs) // (workers * 8))
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=init_worker,
+        initargs=(template_path, basepath, block_cache),
+    ) as executor:
+        for info in executor.map(render_page_job, jobs, chunksize=chunksize):
+            changes = info.pop("block_cache", None)
+            if changes is not None:
+                block_cache.merge_changes(changes)
+            print(f" * {info['source']} {template_path} -> {info['output']}")
+            if on_info is not None:
+                on_info(info)
+
+# Each worker process parses the template once, not once per page, and
+# gets its own copy of the block cache; the entries it adds and its hit
+# counts go back to the parent with each page's info
+worker_template = None
+worker_block_cache = None
 
-    with open(template_path, "r") as file:
-        template = file.read()
+def init_worker(template_path, basepath, block_cache):
+    global worker_template, worker_block_cache
+    worker_template = Template.load(template_path, basepath)
+    worker_block_cache = block_cache
+    if block_cache is not None:
+        block_cache.track_changes()
 
-    html_content = markdown_to_html_node(mdx).to_html()
-    title = extract_title(mdx)
+def render_page_job(job):
+    from_path, template_path, dest_path, basepath, index_text = job
+    try:
+        info = write_page(from_path, template_path, dest_path, basepath, worker_template, worker_block_cache, index_text)
+    except Exception as e:
+        raise PageError(f"{from_path}: {e!r}") from e
+    if worker_block_cache is not None:
+        info["block_cache"] = worker_block_cache.take_changes()
+    return info
 
-    template = template.replace("{{ Title }}", title)
-    template = template.replace("{{ Content }}", html_content)
+def generate_pages_async(pages, template_path, basepath, io_workers, block_cache=None, index_text=False, on_info=None):
+    template = Template.load(template_path, basepath)
+    dest_paths = dict(pages)
+    pending = {}
 
-    template = template.replace('href="/', f'href="{basepath}')
-    template = template.replace("href='/", f"href='{basepath}")
-    template = template.replace('src="/', f'src="{basepath}')
-    template = template.replace("src='/", f"src='{basepath}")
+    def read(from_path):
+        # Pages at or above STREAM_THRESHOLD are not read whole; render
+        # streams them straight to their output instead
+        if os.path.getsize(from_path) >= STREAM_THRESHOLD:
+            return None
+        return read_text(from_path)
+
+    def render(from_path, mdx):
+        try:
+            if mdx is None:
+                dest_path = dest_paths[from_path]
+                os.makedirs(os.path.dirname(dest_path) or ".", exist_ok=True)
+                pending[from_path] = stream_page(from_path, dest_path, template, block_cache, index_text)
+                return None
+
+            meta, body = split_front_matter(mdx)
+            node = markdown_to_html_node(body, block_cache)
+            title = extract_title(body)
+            html = template.render(title, node)
+        except Exception as e:
+            raise PageError(f"{from_path}: {e!r}") from e
+        pending[from_path] = node_page_info(from_path, dest_paths[from_path], title, node, index_text, meta)
+        return html
+
+    def write(dest_path, html):
+        if html is not None:
+            write_text(dest_path, html)
+
+    def on_page(from_path, dest_path):
+        print(f" * {from_path} {template_path} -> {dest_path}")
+        info = pending.pop(from_path)
+        if on_info is not None:
+            on_info(info)
+
+    # OSErrors from the read and write threads already name their path
+    run_pipeline(pages, render, io_workers=io_workers, read=read, write=write, on_page=on_page)
+
+def generate_page(from_path, template_path, dest_path, basepath, template=None, block_cache=None, index_text=False):
+    print(f" * {from_path} {template_path} -> {dest_path}")
+    return write_page(from_path, template_path, dest_path, basepath, template, block_cache, index_text)
+
+def write_page(from_path, template_path, dest_path, basepath, template=None, block_cache=None, index_text=False):
+    if template is None:
+        template = Template.load(template_path, basepath)
 
     dest_dir_path = os.path.dirname(dest_path)
     if dest_dir_path != "":
         os.makedirs(dest_dir_path, exist_ok=True)
 
+    profiler = profiling.active
+    if os.path.getsize(from_path) >= STREAM_THRESHOLD:
+        if profiler is None:
+            return stream_page(from_path, dest_path, template, block_cache, index_text)
+
+        # Parsing, rendering and writing interleave block by block here, so
+        # the page is timed as a single "stream" stage
+        start = time.perf_counter()
+        info = stream_page(from_path, dest_path, template, block_cache, index_text)
+        end = time.perf_counter()
+        profiler.add("stream", start, end)
+        profiler.add_page(from_path, start, end)
+        return info
+
+    if profiler is not None:
+        return profile_page(profiler, from_path, dest_path, template, block_cache, index_text)
+
+    with open(from_path, "r") as file:
+        mdx = file.read()
+
+    meta, body = split_front_matter(mdx)
+    node = markdown_to_html_node(body, block_cache)
+    title = extract_title(body)
+
     with open(dest_path, "w") as file:
-        file.write(template)
+        template.write(file, title, node)
+
+    return node_page_info(from_path, dest_path, title, node, index_text, meta)
+
+def profile_page(profiler, from_path, dest_path, template, block_cache=None, index_text=False):
+    # Same steps as write_page, but rendered to a string first so to_html,
+    # template substitution and the write can be timed separately
+    clock = time.perf_counter
+    page_start = start = clock()
+    with open(from_path, "r") as file:
+        mdx = file.read()
+    profiler.add("read", start, clock())
+
+    meta, body = split_front_matter(mdx)
+    start = clock()
+    node = markdown_to_html_node(body, block_cache)
+    profiler.add("markdown_to_html_node", start, clock())
+    title = extract_title(body)
+
+    start = clock()
+    content = node.to_html(template.basepath)
+    profiler.add("to_html", start, clock())
+
+    start = clock()
+    html = template.fill(title, content)
+    profiler.add("template", start, clock())
+
+    start = clock()
+    with open(dest_path, "w") as file:
+        file.write(html)
+    profiler.add("write", start, clock())
+    profiler.add_page(from_path, page_start, clock())
+    return node_page_info(from_path, dest_path, title, node, index_text, meta)
+
+def stream_page(from_path, dest_path, template, block_cache=None, index_text=False):
+    # Peak memory is bounded by the largest block rather than the file
+    with open(from_path, "r") as file:
+        meta, skip = read_front_matter(file)
+    with open(from_path, "r") as file:
+        file.read(skip)
+        title = find_title(file)
+
+    node = blocks_to_html_node(iter_file_blocks(from_path, skip=skip), block_cache)
+    # The children are a one-shot generator, so collect URLs and search
+    # terms block by block as they render
+    urls = []
+    terms = PageTerms() if index_text else None
+    node.children = tap_blocks(node.children, urls, terms)
+    try:
+        with open(dest_path, "w") as file:
+            template.write(file, title, node)
+    except Exception:
+        os.remove(dest_path)
+        raise
+
+    return page_info(from_path, dest_path, title, urls, terms.terms if terms is not None else None, meta)
+
+def tap_blocks(children, urls, terms=None):
+    for child in children:
+        urls.extend(child.iter_urls())
+        if terms is not None:
+            for text in child.iter_text():
+                terms.add(text)
+        yield child
+
+def node_page_info(from_path, dest_path, title, node, index_text=False, meta=None):
+    terms = page_terms(node.iter_text()) if index_text else None
+    return page_info(from_path, dest_path, title, node.iter_urls(), terms, meta)
+
+def page_info(from_path, dest_path, title, urls, terms=None, meta=None):
+    info = {
+        "source": from_path,
+        "output": dest_path,
+        "title": title,
+        "meta": meta if meta is not None else {},
+        "links": [],
+        "images": [],
+    }
+    for tag, url in urls:
+        info["images" if tag == "img" else "links"].append(url)
+    if terms is not None:
+        info["terms"] = terms
+    return info
 
 def extract_title(markdown):
-    lines = markdown.split("\n")
+    # Same result as find_title over the lines, but str.find jumps straight
+    # to the first "# " line instead of splitting the whole document
+    if markdown.startswith("# "):
+        start = 2
+    else:
+        start = markdown.find("\n# ")
+        if start == -1:
+            raise ValueError("no title found")
+        start += 3
+
+    end = markdown.find("\n", start)
+    if end == -1:
+        end = len(markdown)
+    return markdown[start:end].strip()
+
+def find_title(lines):
     for line in lines:
         if line.startswith("# "):
             return line[2:].strip()
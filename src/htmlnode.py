@@ -1,62 +1,417 @@
+import re
+from html import escape, unescape
+from types import MappingProxyType
+
+tag_pattern = re.compile(r"<[^>]*>")
+
+# The attribute holding a URL for each tag that markdown emits with one
+URL_PROPS = {"a": "href", "img": "src"}
+
+def rewrite_url(tag, prop, val, basepath):
+    # basepath is a prefix for root-relative URLs ("/docs" -> basepath + "docs")
+    # or a callable (tag, prop, url) -> url for any other rewriting
+    if URL_PROPS.get(tag) != prop or not isinstance(val, str):
+        return val
+
+    if callable(basepath):
+        return basepath(tag, prop, val)
+
+    if val.startswith("/") and not val.startswith("//"):
+        return basepath + val[1:]
+    return val
+
+def escape_text(text):
+    # Most text has nothing to escape, and the membership tests are cheaper
+    # than the replaces html.escape always runs
+    if "&" in text or "<" in text or ">" in text:
+        return escape(text, quote=False)
+    return text
+
+def escape_attr(val):
+    val = str(val)
+    if "&" in val or "<" in val or ">" in val or "'" in val or '"' in val:
+        return escape(val)
+    return val
+
+# Serialized attributes by (tag, basepath, props items); the same link and
+# image targets recur on every page, so most lookups hit
+ATTR_CACHE_SIZE = 4096
+attr_cache = {}
+
+def serialize_props(tag, props, basepath):
+    url_prop = URL_PROPS.get(tag) if basepath is not None else None
+    attrs = []
+    for prop, val in props.items():
+        if prop == url_prop:
+            val = rewrite_url(tag, prop, val, basepath)
+        attrs.append(f"{prop}='{escape_attr(val)}'")
+    return " ".join(attrs)
+
+class WatchedList(list):
+    # A watched node's children. Editing the list in place marks the node
+    # dirty, and new children start watching for changes of their own.
+    __slots__ = ("owner",)
+
+    def __init__(self, owner, items=()):
+        super().__init__(items)
+        self.owner = owner
+
+    def changed(self):
+        for child in self:
+            child.watch(self.owner)
+        self.owner.invalidate()
+
+def watched_method(name):
+    method = getattr(list, name)
+
+    def mutate(self, *args, **kwargs):
+        result = method(self, *args, **kwargs)
+        self.changed()
+        return result
+
+    mutate.__name__ = name
+    return mutate
+
+for name in (
+    "__setitem__", "__delitem__", "__iadd__", "__imul__",
+    "append", "extend", "insert", "pop", "remove", "clear", "sort", "reverse",
+):
+    setattr(WatchedList, name, watched_method(name))
+
+class WatchedProps(dict):
+    # A watched node's props; editing them in place marks the node dirty
+    __slots__ = ("owner",)
+
+    def __init__(self, owner, items=()):
+        super().__init__(items)
+        self.owner = owner
+
+def watched_props_method(name):
+    method = getattr(dict, name)
+
+    def mutate(self, *args, **kwargs):
+        result = method(self, *args, **kwargs)
+        self.owner.invalidate()
+        return result
+
+    mutate.__name__ = name
+    return mutate
+
+for name in ("__setitem__", "__delitem__", "__ior__", "update", "pop", "popitem", "clear", "setdefault"):
+    setattr(WatchedProps, name, watched_props_method(name))
+
+class Watched:
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        if name == "children":
+            if isinstance(self.children, (list, tuple)):
+                for child in self.children:
+                    child.unwatch(self)
+            if type(value) is list:
+                value = WatchedList(self, value)
+            object.__setattr__(self, name, value)
+            if isinstance(value, (list, tuple)):
+                for child in value:
+                    child.watch(self)
+        elif name == "props" and type(value) is dict:
+            object.__setattr__(self, name, WatchedProps(self, value))
+        else:
+            object.__setattr__(self, name, value)
+        self.invalidate()
+
+class Frozen:
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"cannot set {name!r} on a frozen node")
+
+# Nodes switch to a Watched or Frozen subclass of their own class only when
+# they first get cached or frozen, so building a tree pays for neither
+variants = {}
+
+def node_variant(mixin, cls):
+    cls = getattr(cls, "plain_class", cls)
+    variant = variants.get((mixin, cls))
+    if variant is None:
+        variant = type(mixin.__name__ + cls.__name__, (mixin, cls), {"__slots__": (), "plain_class": cls})
+        variants[(mixin, cls)] = variant
+    return variant
+
+# Internal writes that must not count as mutations
+set_slot = object.__setattr__
+
 class HTMLNode:
+    __slots__ = ("tag", "value", "children", "props", "cache", "parents")
+
     def __init__(self, tag=None, value=None, children=None, props=None):
         self.tag = tag
         self.value = value
         self.children = children
         self.props = props
+        # None until the first to_html, False after it, then {basepath:
+        # html}; emptied whenever the subtree changes. Frozen nodes only
+        # keep a cache at the frozen root.
+        self.cache = None
+        # The watched nodes holding this one as a child, told when it
+        # changes; None while the node is not watched
+        self.parents = None
+
+    def to_html(self, basepath=None):
+        cache = self.cache
+        if cache:
+            html = cache.get(basepath)
+            if html is not None:
+                return html
+
+        parts = []
+        self.emit(parts.append, basepath)
+        html = "".join(parts)
 
-    def to_html(self):
+        if cache is None:
+            # Most trees are rendered once and dropped, so caching (and
+            # watching the subtree for changes) starts on the second call
+            set_slot(self, "cache", False)
+        elif cache is False:
+            self.watch()
+            set_slot(self, "cache", {basepath: html})
+        else:
+            cache[basepath] = html
+        return html
+
+    def render(self, write, basepath=None):
+        cache = self.cache
+        if cache is None or cache is False:
+            self.emit(write, basepath)
+        else:
+            # Only the node to_html was called on, or a frozen root, keeps
+            # its HTML; caching every level would hold the text once per depth
+            write(self.to_html(basepath))
+
+    def emit(self, write, basepath=None):
         raise NotImplementedError()
 
-    def props_to_html(self):
-        attr = ""
+    def cached_html(self, basepath):
+        cache = self.cache
+        if not cache:
+            return None
+        return cache.get(basepath)
+
+    def watch(self, parent=None):
+        # Swaps this subtree into Watched variants with tracked children
+        # and props, so any change empties the caches above it
+        if isinstance(self, Frozen):
+            return
+
+        parents = self.parents
+        if parents is None:
+            set_slot(self, "__class__", node_variant(Watched, type(self)))
+            set_slot(self, "parents", [] if parent is None else [parent])
+            children = self.children
+            if type(children) is list:
+                children = WatchedList(self, children)
+                set_slot(self, "children", children)
+            if type(self.props) is dict:
+                set_slot(self, "props", WatchedProps(self, self.props))
+            if isinstance(children, (list, tuple)):
+                for child in children:
+                    child.watch(self)
+        elif parent is not None and not any(node is parent for node in parents):
+            parents.append(parent)
+
+    def unwatch(self, parent):
+        parents = self.parents
+        if parents:
+            for i, node in enumerate(parents):
+                if node is parent:
+                    del parents[i]
+                    return
 
-        if self.props == None:
-            return attr 
+    def invalidate(self):
+        # Marks this node and every watched ancestor dirty. A node shared by
+        # several trees has several parents, so each is visited once.
+        seen = set()
+        pending = [self]
+        while pending:
+            node = pending.pop()
+            if id(node) in seen:
+                continue
+            seen.add(id(node))
+            if node.cache:
+                set_slot(node, "cache", {})
+            if node.parents:
+                pending.extend(node.parents)
 
-        attrLst = []
-        for prop, val in self.props.items():
-            attrLst.append(f"{prop}='{val}'")
-        
-        attr = (" ").join(attrLst)
+    def freeze(self):
+        # Makes the subtree immutable. This node then keeps its HTML (one
+        # string per basepath) the first time it is rendered, so a frozen
+        # tree or a subtree shared between pages costs O(1) after that.
+        self.freeze_subtree()
+        if not self.cache:
+            set_slot(self, "cache", {})
+        return self
 
+    def freeze_subtree(self):
+        if isinstance(self, Frozen):
+            return
+
+        if self.children is not None:
+            set_slot(self, "children", tuple(self.children))
+            for child in self.children:
+                child.freeze_subtree()
+        if self.props is not None:
+            set_slot(self, "props", MappingProxyType(dict(self.props)))
+        set_slot(self, "cache", None)
+        set_slot(self, "parents", None)
+        set_slot(self, "__class__", node_variant(Frozen, type(self)))
+
+    def write_html(self, file, basepath=None):
+        self.render(file.write, basepath)
+
+    def iter_html(self, basepath=None):
+        raise NotImplementedError()
+
+    def props_to_html(self, basepath=None):
+        props = self.props
+        if props is None:
+            return ""
+
+        try:
+            key = (self.tag, basepath, tuple(props.items()))
+            attr = attr_cache.get(key)
+        except TypeError:
+            # An unhashable value or rewriter; serialize without caching
+            return serialize_props(self.tag, props, basepath)
+
+        if attr is None:
+            attr = serialize_props(self.tag, props, basepath)
+            if len(attr_cache) >= ATTR_CACHE_SIZE:
+                attr_cache.clear()
+            attr_cache[key] = attr
         return attr
 
+    def iter_urls(self):
+        # (tag, url) for every a/img in this subtree, in document order.
+        # Lazily built children (a streamed page) are left unconsumed.
+        prop = URL_PROPS.get(self.tag)
+        if prop is not None and self.props is not None and prop in self.props:
+            yield (self.tag, self.props[prop])
+
+        if isinstance(self.children, (list, tuple)):
+            for child in self.children:
+                yield from child.iter_urls()
+
+    def iter_text(self):
+        # The raw text of every leaf in document order, as in the markdown
+        if self.value:
+            yield self.value
+
+        if isinstance(self.children, (list, tuple)):
+            for child in self.children:
+                yield from child.iter_text()
+
     def __repr__(self):
         return f"HTMLNode({self.tag}, {self.value}, {self.children}, {self.props})"
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag=None, value=None, props=None):
         super().__init__(tag, value, None, props)
 
-    def to_html(self):
+    def to_html(self, basepath=None):
         if self.value == None:
             raise ValueError
 
         if self.tag == None:
-            return self.value
+            return escape_text(self.value)
 
-        if self.props_to_html() != "": 
-            return f"<{self.tag} {self.props_to_html()}>{self.value}</{self.tag}>"
+        attr = self.props_to_html(basepath)
+        if attr != "": 
+            return f"<{self.tag} {attr}>{escape_text(self.value)}</{self.tag}>"
 
-        return f"<{self.tag}>{self.value}</{self.tag}>"
+        return f"<{self.tag}>{escape_text(self.value)}</{self.tag}>"
+
+    def render(self, write, basepath=None):
+        write(self.to_html(basepath))
+
+    def iter_html(self, basepath=None):
+        yield self.to_html(basepath)
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, children, props=None):
         super().__init__(tag, None, children, props)
 
-    def to_html(self):
+    def open_tag(self, basepath=None):
         if self.tag == None:
             raise ValueError("Parent nodes must have a tag")
 
         if self.children == None:
             raise ValueError("Parent nodes must have a children")
 
-        children = ""
+        attr = self.props_to_html(basepath)
+        if attr != "": 
+            return f"<{self.tag} {attr}>"
+
+        return f"<{self.tag}>"
+
+    def render(self, write, basepath=None):
+        cache = self.cache
+        if cache is not None and cache is not False:
+            write(self.to_html(basepath))
+            return
+
+        write(self.open_tag(basepath))
+        for child in self.children:
+            child.render(write, basepath)
+        write(f"</{self.tag}>")
+
+    def emit(self, write, basepath=None):
+        write(self.open_tag(basepath))
         for child in self.children:
-            children += child.to_html()
+            child.render(write, basepath)
+        write(f"</{self.tag}>")
+
+    def iter_html(self, basepath=None):
+        html = self.cached_html(basepath)
+        if html is not None:
+            yield html
+            return
+
+        yield self.open_tag(basepath)
+        for child in self.children:
+            yield from child.iter_html(basepath)
+        yield f"</{self.tag}>"
+
+class RawNode(HTMLNode):
+    __slots__ = ("basepath", "urls")
+
+    # Already-rendered HTML, emitted as is. It remembers the basepath it was
+    # rendered with so it is never emitted for a different one, and the
+    # (tag, url) pairs of the nodes it replaced.
+    def __init__(self, value, basepath=None, urls=()):
+        super().__init__(None, value, None, None)
+        self.basepath = basepath
+        self.urls = urls
+
+    def to_html(self, basepath=None):
+        if basepath != self.basepath:
+            raise ValueError(f"raw HTML was rendered for basepath {self.basepath!r}")
+        return self.value
+
+    def render(self, write, basepath=None):
+        write(self.to_html(basepath))
+
+    def iter_html(self, basepath=None):
+        yield self.to_html(basepath)
 
-        if self.props_to_html() != "": 
-            return f"<{self.tag} {self.props_to_html()}>{children}</{self.tag}>"
+    def iter_urls(self):
+        for tag, url in self.urls:
+            yield (tag, url)
 
-        return f"<{self.tag}>{children}</{self.tag}>"
+    def iter_text(self):
+        for text in tag_pattern.split(self.value):
+            if text:
+                yield unescape(text)
@@ -1,16 +1,57 @@
 import re
 from textnode import TextType, TextNode
 
+# Images and links in one alternation; group 1 is "!" for an image
+inline_pattern = re.compile(r"(!?)\[([^\[\]]*)\]\(([^\(\)]*)\)")
+
+delimiters = (
+    ("**", TextType.BOLD),
+    ("`", TextType.CODE),
+    ("_", TextType.ITALIC),
+)
+
 def text_to_textnodes(text):
-    node = TextNode(text, TextType.TEXT)
-    nodes = split_nodes_image([node])   
-    nodes = split_nodes_links(nodes)   
-    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)   
-    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)   
-    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)   
+    # Same output as running split_nodes_image, split_nodes_links and
+    # split_nodes_delimiter for **, ` and _ in turn, but in one scan of text
+    nodes = []
+    pos = 0
+    for match in inline_pattern.finditer(text):
+        start = match.start()
+        if start > pos:
+            split_text_delimiters(text[pos:start], 0, nodes)
+
+        bang, label, url = match.groups()
+        if bang:
+            nodes.append(TextNode(label, TextType.IMAGE, url))
+        else:
+            nodes.append(TextNode(label, TextType.LINK, url))
+        pos = match.end()
+
+    if pos < len(text):
+        split_text_delimiters(text[pos:], 0, nodes)
 
     return nodes
 
+def split_text_delimiters(text, level, nodes):
+    if level == len(delimiters):
+        nodes.append(TextNode(text, TextType.TEXT))
+        return
+
+    delimiter, text_type = delimiters[level]
+    if delimiter not in text:
+        split_text_delimiters(text, level + 1, nodes)
+        return
+
+    parts = text.split(delimiter)
+    if len(parts) % 2 == 0:
+        raise Exception("Invalid Markdown!")
+
+    for i, part in enumerate(parts):
+        if i % 2 == 0:
+            split_text_delimiters(part, level + 1, nodes)
+        else:
+            nodes.append(TextNode(part, text_type))
+
 def create_text_nodes(nodes, alt_type):
     new_nodes = []
     for i in range(len(nodes)):
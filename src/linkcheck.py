@@ -0,0 +1,97 @@
+import os
+import json
+from urllib.parse import urlsplit, urljoin, unquote
+from shard import walk_files, page_output
+
+LINK_INDEX_NAME = ".links.json"
+
+class LinkIndex:
+    # Outbound links and image sources per output page, as written in the
+    # markdown. Kept between incremental builds so pages that were not
+    # re-rendered are still checked.
+    def __init__(self, path=None, pages=None):
+        self.path = path
+        self.pages = pages if pages is not None else {}
+
+    @classmethod
+    def load(cls, dir_path):
+        path = os.path.join(dir_path, LINK_INDEX_NAME)
+        if not os.path.exists(path):
+            return cls(path)
+
+        with open(path, "r") as file:
+            try:
+                pages = json.load(file)
+            except ValueError:
+                return cls(path)
+
+        if not isinstance(pages, dict):
+            return cls(path)
+
+        return cls(path, pages)
+
+    def record(self, info):
+        self.pages[os.path.normpath(info["output"])] = {
+            "source": info["source"],
+            "links": info["links"],
+            "images": info["images"],
+        }
+
+    def __contains__(self, output):
+        return os.path.normpath(output) in self.pages
+
+    def retain(self, outputs):
+        outputs = {os.path.normpath(output) for output in outputs}
+        for output in [output for output in self.pages if output not in outputs]:
+            del self.pages[output]
+
+    def save(self):
+        with open(self.path, "w") as file:
+            json.dump(self.pages, file, indent=1, sort_keys=True)
+
+    def check(self, dest_dir_path, dir_path_content, dir_path_static):
+        # One pass over every recorded URL against two sets built up front,
+        # so the check costs a set lookup per link
+        pages = {target_path("/" + page_output(path)) for path in walk_files(dir_path_content)}
+        files = {target_path("/" + path) for path in walk_files(dir_path_static)}
+
+        broken = []
+        totals = {"links": 0, "images": 0}
+        for output in sorted(self.pages):
+            page = self.pages[output]
+            page_dir = os.path.relpath(os.path.dirname(output), dest_dir_path).replace(os.sep, "/")
+            base = "/" if page_dir == "." else "/" + page_dir + "/"
+            for kind in ("links", "images"):
+                for url in page[kind]:
+                    totals[kind] += 1
+                    target = internal_target(url, base)
+                    if target is None or target in pages or target in files:
+                        continue
+                    broken.append({"page": output, "source": page["source"], "kind": kind[:-1], "url": url})
+
+        return {
+            "pages": len(self.pages),
+            "links": totals["links"],
+            "images": totals["images"],
+            "broken": broken,
+        }
+
+def target_path(url):
+    path = unquote(url)
+    if path.endswith("/index.html"):
+        path = path[:-len("index.html")]
+    if len(path) > 1:
+        path = path.rstrip("/")
+    return path
+
+def internal_target(url, base):
+    # The site path a link points at, or None for external URLs and links
+    # within the same page
+    parts = urlsplit(url)
+    if parts.scheme or parts.netloc or not parts.path:
+        return None
+    return target_path(urlsplit(urljoin(base, parts.path)).path)
+
+def write_report(report, path):
+    with open(path, "w") as file:
+        json.dump(report, file, indent=1)
@@ -1,35 +1,322 @@
 import os
-import sys
 import shutil
-from copystatic import copy_files_recursive
+import argparse
+import cProfile
+import profiling
+from copystatic import copy_files_recursive, LINK_MODES, COMPARE_MODES
 from gencontent import generate_pages_recursive
+from manifest import Manifest
+from blockcache import BlockCache
+from depgraph import DependencyGraph, changed_keys
+from shard import Shard, ShardError, write_shard_manifest, merge_shards
+from linkcheck import LinkIndex, write_report
+from searchindex import SearchIndex
+from frontmatter import MetadataCache
+from sitemap import SiteIndexWriter
+from watch import SiteWatcher, serve
 
 dir_path_static = "./static"
 dir_path_public = "./docs"
 dir_path_content = "./content"
 template_path = "./template.html"
 
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("basepath", nargs="?", default="/")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="only rebuild pages and static files whose sources changed",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="render pages across this many processes (0 uses every CPU)",
+    )
+    parser.add_argument(
+        "--async-io",
+        type=int,
+        default=0,
+        metavar="THREADS",
+        help="overlap page reads and writes with rendering using this many I/O threads",
+    )
+    parser.add_argument(
+        "--static-link",
+        choices=LINK_MODES,
+        default="copy",
+        help="hardlink or reflink static files instead of copying when possible",
+    )
+    parser.add_argument(
+        "--static-compare",
+        choices=COMPARE_MODES,
+        default="stat",
+        help="how --incremental decides a static file is unchanged",
+    )
+    parser.add_argument(
+        "--block-cache",
+        nargs="?",
+        const="",
+        metavar="PATH",
+        help="reuse rendered HTML for identical blocks; persist it to PATH if given",
+    )
+    parser.add_argument("--block-cache-size", type=int, default=4096)
+    parser.add_argument(
+        "--depgraph",
+        action="store_true",
+        help="record which inputs each page depends on (always on with --incremental)",
+    )
+    parser.add_argument(
+        "--affected",
+        nargs="+",
+        metavar="PATH",
+        help="print the pages the last recorded build would rebuild for these changed files, then exit",
+    )
+    parser.add_argument(
+        "--changed",
+        nargs="+",
+        metavar="PATH",
+        help="with --incremental, rebuild only the pages the recorded graph says depend on these files"
+        " (e.g. from git diff --name-only) instead of hashing every page",
+    )
+    parser.add_argument(
+        "--check-links",
+        nargs="?",
+        const="",
+        metavar="REPORT",
+        help="check internal links and images against the built site; write a JSON report to REPORT if given",
+    )
+    parser.add_argument(
+        "--fail-on-broken-links",
+        action="store_true",
+        help="exit non-zero if --check-links finds a broken link",
+    )
+    parser.add_argument(
+        "--metadata-cache",
+        action="store_true",
+        help="keep each page's front matter and title in docs/.metadata.json (always on with --incremental)",
+    )
+    parser.add_argument(
+        "--site-url",
+        help="write sitemap.xml and feed.xml with page URLs under this origin, e.g. https://example.com",
+    )
+    parser.add_argument("--feed-title", help="title of the RSS feed (defaults to the site URL)")
+    parser.add_argument("--feed-description", default="", help="description of the RSS feed")
+    parser.add_argument(
+        "--search-index",
+        action="store_true",
+        help="build a client-side search index under docs/search/ while pages render",
+    )
+    parser.add_argument("--search-shards", type=int, default=16, help="files the search index is split into")
+    parser.add_argument(
+        "--shard-index",
+        type=int,
+        help="build only this shard's share of pages and static files",
+    )
+    parser.add_argument("--shard-count", type=int, help="total number of shards")
+    parser.add_argument(
+        "--merge",
+        nargs="+",
+        metavar="SHARD_DIR",
+        help="check that these shard outputs cover the site exactly once, combine them into docs/ and exit",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="keep running, serve the output and re-render pages as sources change",
+    )
+    parser.add_argument("--port", type=int, default=8888)
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="time each build stage and print a report at the end (renders serially)",
+    )
+    parser.add_argument("--profile-top", type=int, default=10, help="slowest pages to list")
+    parser.add_argument("--profile-trace", help="write stage timings and a JSON trace here")
+    parser.add_argument("--cprofile", help="write cProfile stats for page generation here")
+    args = parser.parse_args()
+    if (args.shard_index is None) != (args.shard_count is None):
+        parser.error("--shard-index and --shard-count must be given together")
+    if args.fail_on_broken_links and args.check_links is None:
+        args.check_links = ""
+    if args.changed and not args.incremental:
+        parser.error("--changed requires --incremental")
+    if args.shard_count is not None and args.watch:
+        parser.error("--watch cannot be combined with sharding")
+    return args
+
+def graph_keys(paths):
+    keys = []
+    for path in paths:
+        keys.extend(changed_keys(path, dir_path_content, dir_path_static))
+    return keys
+
 def main():
-    basepath = sys.argv[1] if len(sys.argv) > 1 else "/"
+    args = parse_args()
+    basepath = args.basepath
+    workers = args.workers if args.workers > 0 else os.cpu_count() or 1
+    io_workers = args.async_io
+
+    if args.affected:
+        depgraph = DependencyGraph.load(dir_path_public)
+        for output in sorted(depgraph.affected(graph_keys(args.affected))):
+            print(output)
+        return
+
+    if args.merge:
+        try:
+            merged = merge_shards(args.merge, dir_path_public, dir_path_content, dir_path_static)
+        except ShardError as e:
+            raise SystemExit(f"merge failed: {e}")
+        print(f"merged {merged} files from {len(args.merge)} shards")
+        return
+
+    shard = None
+    if args.shard_count is not None:
+        shard = Shard(args.shard_index, args.shard_count)
+
     print(basepath)
 
-    if os.path.exists(dir_path_public):
-        shutil.rmtree(dir_path_public)
-    os.mkdir(dir_path_public)
+    manifest = None
+    if args.incremental:
+        os.makedirs(dir_path_public, exist_ok=True)
+        manifest = Manifest.load(dir_path_public)
+    else:
+        if os.path.exists(dir_path_public):
+            shutil.rmtree(dir_path_public)
+        os.mkdir(dir_path_public)
 
     if not os.path.exists(dir_path_static):
         raise Exception("static directory could not be found")
-    
+
     print("Copying static files to public directory")
-    copy_files_recursive(dir_path_static, dir_path_public)
-    
+    copy_files_recursive(
+        dir_path_static,
+        dir_path_public,
+        manifest,
+        args.static_link,
+        args.static_compare,
+        shard,
+    )
+
+    profiler = None
+    if args.profile or args.profile_trace:
+        profiler = profiling.enable(trace=args.profile_trace is not None)
+        # Pages are only timed on the serial path, in this process
+        workers = 1
+        io_workers = 0
+
+    cprofile = None
+    if args.cprofile:
+        cprofile = cProfile.Profile()
+        cprofile.enable()
+
+    block_cache = None
+    if args.block_cache is not None:
+        block_cache = BlockCache(basepath, args.block_cache_size, args.block_cache or None)
+
+    depgraph = None
+    if args.incremental or args.depgraph:
+        depgraph = DependencyGraph.load(dir_path_public)
+
+    link_index = None
+    if args.check_links is not None:
+        link_index = LinkIndex.load(dir_path_public)
+
+    search_index = None
+    if args.search_index:
+        search_index = SearchIndex.load(dir_path_public, basepath, args.search_shards)
+
+    metadata_cache = None
+    if args.incremental or args.metadata_cache:
+        metadata_cache = MetadataCache.load(dir_path_public)
+
+    site_index = None
+    if args.site_url:
+        site_index = SiteIndexWriter(
+            dir_path_public,
+            args.site_url,
+            basepath,
+            args.feed_title,
+            args.feed_description,
+        )
+
     print("Generating page...")
     generate_pages_recursive(
         dir_path_content,
         template_path,
         dir_path_public,
         basepath,
+        manifest=manifest,
+        workers=workers,
+        block_cache=block_cache,
+        io_workers=io_workers,
+        depgraph=depgraph,
+        shard=shard,
+        link_index=link_index,
+        search_index=search_index,
+        metadata_cache=metadata_cache,
+        site_index=site_index,
+        changed=graph_keys(args.changed) if args.changed else None,
     )
 
-main()
+    if block_cache is not None:
+        block_cache.save()
+        print(f"block cache: {block_cache.stats()}")
+
+    if cprofile is not None:
+        cprofile.disable()
+        cprofile.dump_stats(args.cprofile)
+
+    if profiler is not None:
+        profiling.disable()
+        print(profiler.report(args.profile_top))
+        if args.profile_trace:
+            profiler.write_trace(args.profile_trace)
+
+    if manifest is not None:
+        manifest.save()
+
+    if depgraph is not None:
+        depgraph.save()
+
+    if search_index is not None:
+        search_index.save()
+
+    if metadata_cache is not None:
+        metadata_cache.save()
+
+    if shard is not None:
+        write_shard_manifest(dir_path_public, shard, dir_path_content, dir_path_static)
+
+    if link_index is not None:
+        link_index.save()
+        report = link_index.check(dir_path_public, dir_path_content, dir_path_static)
+        if args.check_links:
+            write_report(report, args.check_links)
+        print(
+            f"links: {report['links']} links and {report['images']} images"
+            f" on {report['pages']} pages, {len(report['broken'])} broken"
+        )
+        for entry in report["broken"]:
+            print(f"  {entry['source']}: broken {entry['kind']} {entry['url']}")
+        if report["broken"] and args.fail_on_broken_links:
+            raise SystemExit(1)
+
+    if args.watch:
+        watcher = SiteWatcher(
+            dir_path_content,
+            dir_path_static,
+            template_path,
+            dir_path_public,
+            basepath,
+        )
+        serve(dir_path_public, args.port)
+        print("Watching for changes...")
+        try:
+            watcher.run()
+        except KeyboardInterrupt:
+            pass
 
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import os
+import json
+import hashlib
+
+MANIFEST_NAME = ".manifest.json"
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class Manifest:
+    def __init__(self, path, entries=None):
+        self.path = path
+        self.entries = entries if entries is not None else {}
+        self.seen = set()
+
+    @classmethod
+    def load(cls, dir_path):
+        path = os.path.join(dir_path, MANIFEST_NAME)
+        if not os.path.exists(path):
+            return cls(path)
+
+        with open(path, "r") as file:
+            try:
+                entries = json.load(file)
+            except ValueError:
+                return cls(path)
+
+        if not isinstance(entries, dict):
+            return cls(path)
+
+        return cls(path, entries)
+
+    def is_unchanged(self, key, source_path, output_path=None):
+        return self.matches(key, hash_file(source_path), output_path)
+
+    def matches(self, key, digest, output_path=None):
+        # Records the new digest as a side effect, so every key checked
+        # during a build survives the next prune()
+        self.seen.add(key)
+        entry = self.entries.get(key)
+        self.entries[key] = {"hash": digest, "output": output_path}
+
+        if entry is None or entry.get("hash") != digest:
+            return False
+
+        if output_path is None:
+            return True
+
+        return entry.get("output") == output_path and os.path.exists(output_path)
+
+    def track(self, key, output_path):
+        # Keeps an output alive for prune() without hashing its source
+        self.seen.add(key)
+        self.entries[key] = {"hash": None, "output": output_path}
+
+    def keep(self, key):
+        # Keeps an entry as it is, for a source the caller knows is unchanged
+        self.seen.add(key)
+
+    def prune(self, prefix):
+        live = {self.entries[key].get("output") for key in self.seen if key in self.entries}
+        removed = []
+        for key in list(self.entries):
+            if not key.startswith(prefix) or key in self.seen:
+                continue
+
+            output_path = self.entries.pop(key).get("output")
+            if output_path and output_path not in live and os.path.isfile(output_path):
+                os.remove(output_path)
+                remove_empty_dirs(os.path.dirname(output_path), os.path.dirname(self.path))
+                removed.append(output_path)
+
+        return removed
+
+    def save(self):
+        with open(self.path, "w") as file:
+            json.dump(self.entries, file, indent=1, sort_keys=True)
+
+def remove_empty_dirs(dir_path, stop_at):
+    stop_at = os.path.abspath(stop_at)
+    dir_path = os.path.abspath(dir_path)
+    while dir_path != stop_at and dir_path.startswith(stop_at + os.sep):
+        if os.listdir(dir_path):
+            return
+        os.rmdir(dir_path)
+        dir_path = os.path.dirname(dir_path)
@@ -2,7 +2,7 @@ import re
 from enum import Enum
 from textnode import TextNode, TextType, text_node_to_html_node
 from inline_markdown import text_to_textnodes
-from htmlnode import ParentNode
+from htmlnode import ParentNode, RawNode
 
 class BlockType(Enum):
     PARAGRAPH = "paragraph"
@@ -15,59 +15,129 @@ class BlockType(Enum):
 def markdown_to_blocks(markdown):
     return [block.strip() for block in markdown.split("\n\n") if block.strip() != ""]
 
+def iter_markdown_blocks(chunks):
+    # Yields the same blocks as markdown_to_blocks("".join(chunks)) while
+    # holding only the block being assembled; pieces never contain "\n\n",
+    # so a separator can only straddle the edge between pieces and a chunk
+    pieces = []
+    for chunk in chunks:
+        if not chunk:
+            continue
+
+        if pieces and pieces[-1].endswith("\n") and chunk.startswith("\n"):
+            pieces[-1] = pieces[-1][:-1]
+            block = "".join(pieces).strip()
+            if block != "":
+                yield block
+            pieces = []
+            chunk = chunk[1:]
+
+        parts = chunk.split("\n\n")
+        pieces.append(parts[0])
+        if len(parts) == 1:
+            continue
+
+        block = "".join(pieces).strip()
+        if block != "":
+            yield block
+
+        for part in parts[1:-1]:
+            block = part.strip()
+            if block != "":
+                yield block
+
+        pieces = [parts[-1]]
+
+    block = "".join(pieces).strip()
+    if block != "":
+        yield block
+
+def iter_file_blocks(path, chunk_size=1 << 20, skip=0):
+    # skip is a count of leading characters to leave out, e.g. front matter
+    with open(path, "r") as file:
+        if skip:
+            file.read(skip)
+        yield from iter_markdown_blocks(iter(lambda: file.read(chunk_size), ""))
+
+heading_pattern = re.compile(r"^#{1,6}\s.*$")
+code_pattern = re.compile(r"^```(?!`)[\s\S]*?(?<!`)```$")
+unordered_list_pattern = re.compile(r"^- .*(\n- .*)*$")
+ordered_item_pattern = re.compile(r"(\d+)\. ")
+
 def block_to_block_type(block):
+    # Every block type but paragraph is decided by its first character,
+    # so at most one pattern runs per block
+    first = block[:1]
+
     # Match heading
-    if re.match(r"^#{1,6}\s.*$", block):
-        return BlockType.HEADING
+    if first == "#":
+        if heading_pattern.match(block):
+            return BlockType.HEADING
 
     # Match code block
-    if re.match(r"^```(?!`)[\s\S]*?(?<!`)```$", block):
-        return BlockType.CODE
+    elif first == "`":
+        if code_pattern.match(block):
+            return BlockType.CODE
 
     # Match quote block
-    if block.startswith(">"):
+    elif first == ">":
         return BlockType.QUOTE
 
     # Match unordered list
-    if re.match(r"^- .*(\n- .*)*$", block):
-        return BlockType.UNORDERED_LIST
+    elif first == "-":
+        if unordered_list_pattern.match(block):
+            return BlockType.UNORDERED_LIST
 
     # Match ordered list
-    if is_ordered_list_block(block):
-        return BlockType.ORDERED_LIST
+    elif first.isdigit():
+        if is_ordered_list_block(block):
+            return BlockType.ORDERED_LIST
 
     return BlockType.PARAGRAPH
 
-ordered_block_pattern = re.compile(r"^(\d+)\. .*(?:\n\d+\. .*)*$")
-
 def is_ordered_list_block(text: str) -> bool:
-    # must look like only ordered-list lines
-    if not re.fullmatch(ordered_block_pattern, text):
-        return False
-
-    lines = text.split("\n")
-    nums = []
-    for line in lines:
-        m = re.match(r"^(\d+)\. ", line)
-        if not m:
+    # every line must be "<n>. " with n counting up from 1
+    expected = 1
+    for line in text.split("\n"):
+        m = ordered_item_pattern.match(line)
+        if not m or int(m.group(1)) != expected:
             return False
-        nums.append(int(m.group(1)))
+        expected += 1
 
-    # now enforce 1,2,3,...
-    if not nums:
-        return False
-    return nums[0] == 1 and nums == list(range(1, len(nums) + 1))
+    return True
 
-def markdown_to_html_node(markdown):
+def markdown_to_html_node(markdown, block_cache=None):
     blocks = markdown_to_blocks(markdown)
     children = []
 
     for block in blocks:
-        html_node = block_to_html_node(block)
+        if block_cache is None:
+            html_node = block_to_html_node(block)
+        else:
+            html_node = cached_block_to_html_node(block, block_cache)
         children.append(html_node)
 
     return ParentNode("div", children, None)
 
+def blocks_to_html_node(blocks, block_cache=None):
+    # Children are built lazily as the node is rendered, so a streamed
+    # document is converted one block at a time; the node renders only once
+    if block_cache is None:
+        children = (block_to_html_node(block) for block in blocks)
+    else:
+        children = (cached_block_to_html_node(block, block_cache) for block in blocks)
+    return ParentNode("div", children, None)
+
+def cached_block_to_html_node(block, block_cache):
+    entry = block_cache.get(block)
+    if entry is None:
+        node = block_to_html_node(block)
+        entry = (node.to_html(block_cache.basepath), list(node.iter_urls()))
+        block_cache.put(block, entry)
+
+    html, urls = entry
+    return RawNode(html, block_cache.basepath, urls)
+
 def block_to_html_node(block):
     block_type = block_to_block_type(block)
     match block_type:
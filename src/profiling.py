@@ -0,0 +1,144 @@
+import json
+import time
+import functools
+import markdown_blocks
+
+# The profiler in use, or None. Build code checks this once per page; the
+# finer-grained stages are timed by wrappers that enable() swaps into the
+# parser modules, so a disabled profiler adds no work to the hot paths.
+active = None
+
+BLOCK_STAGES = {
+    "paragraph_to_html_node": "block.paragraph",
+    "heading_to_html_node": "block.heading",
+    "code_to_html_node": "block.code",
+    "quote_to_html_node": "block.quote",
+    "ulist_to_html_node": "block.unordered_list",
+    "olist_to_html_node": "block.ordered_list",
+}
+
+def wrapped_functions():
+    targets = [
+        (markdown_blocks, "markdown_to_blocks", "markdown_to_blocks"),
+        (markdown_blocks, "text_to_textnodes", "text_to_textnodes"),
+    ]
+    for name, stage in BLOCK_STAGES.items():
+        targets.append((markdown_blocks, name, stage))
+    return targets
+
+class Profiler:
+    def __init__(self, trace=False):
+        self.totals = {}
+        self.counts = {}
+        self.pages = []
+        self.events = [] if trace else None
+        self.origin = time.perf_counter()
+        self.originals = []
+
+    def add(self, stage, start, end):
+        self.totals[stage] = self.totals.get(stage, 0.0) + (end - start)
+        self.counts[stage] = self.counts.get(stage, 0) + 1
+        if self.events is not None:
+            self.events.append({
+                "name": stage,
+                "ph": "X",
+                "ts": round((start - self.origin) * 1e6, 3),
+                "dur": round((end - start) * 1e6, 3),
+                "pid": 0,
+                "tid": 0,
+            })
+
+    def add_page(self, path, start, end):
+        self.pages.append((end - start, path))
+        self.add("page", start, end)
+
+    def wrap(self, stage, func):
+        clock = time.perf_counter
+
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.add(stage, start, clock())
+
+        return timed
+
+    def summary(self):
+        durations = sorted(seconds for seconds, _ in self.pages)
+        return {
+            "pages": len(self.pages),
+            "stages": {
+                stage: {
+                    "calls": self.counts[stage],
+                    "seconds": round(self.totals[stage], 6),
+                    "mean_ms": round(self.totals[stage] * 1000 / self.counts[stage], 4),
+                }
+                for stage in sorted(self.totals, key=self.totals.get, reverse=True)
+            },
+            "page_ms": {
+                f"p{p}": round(percentile(durations, p) * 1000, 4)
+                for p in (50, 90, 99)
+            },
+        }
+
+    def slowest(self, n=10):
+        return sorted(self.pages, reverse=True)[:n]
+
+    def report(self, top=10):
+        summary = self.summary()
+        lines = [f"Build profile ({summary['pages']} pages, stage times are inclusive)"]
+        for stage, stats in summary["stages"].items():
+            lines.append(
+                f"  {stage:<24} {stats['seconds'] * 1000:10.2f} ms"
+                f" {stats['calls']:>9} calls {stats['mean_ms']:10.4f} ms/call"
+            )
+
+        if self.pages:
+            page_ms = summary["page_ms"]
+            lines.append(
+                f"  page time p50 {page_ms['p50']:.2f} ms"
+                f"  p90 {page_ms['p90']:.2f} ms  p99 {page_ms['p99']:.2f} ms"
+            )
+            lines.append(f"  slowest {min(top, len(self.pages))} pages:")
+            for seconds, path in self.slowest(top):
+                lines.append(f"    {seconds * 1000:10.2f} ms  {path}")
+
+        return "\n".join(lines)
+
+    def write_trace(self, path):
+        with open(path, "w") as file:
+            json.dump({"summary": self.summary(), "traceEvents": self.events or []}, file)
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def enable(trace=False):
+    global active
+    if active is not None:
+        return active
+
+    profiler = Profiler(trace)
+    for module, name, stage in wrapped_functions():
+        original = getattr(module, name)
+        profiler.originals.append((module, name, original))
+        setattr(module, name, profiler.wrap(stage, original))
+
+    active = profiler
+    return profiler
+
+def disable():
+    global active
+    profiler = active
+    if profiler is None:
+        return None
+
+    for module, name, original in reversed(profiler.originals):
+        setattr(module, name, original)
+    profiler.originals = []
+    active = None
+    return profiler
@@ -0,0 +1,231 @@
+import os
+import re
+import json
+from array import array
+
+SEARCH_DIR = "search"
+SEARCH_VERSION = 2
+
+word_pattern = re.compile(r"\w+")
+
+class PageTerms:
+    # Term -> positions for one page, fed text a piece at a time so a
+    # streamed page never has to be held as one string
+    def __init__(self):
+        self.terms = {}
+        self.position = 0
+
+    def add(self, text):
+        terms = self.terms
+        position = self.position
+        for match in word_pattern.finditer(text.lower()):
+            term = match.group()
+            positions = terms.get(term)
+            if positions is None:
+                terms[term] = [position]
+            else:
+                positions.append(position)
+            position += 1
+        self.position = position
+
+def page_terms(texts):
+    collected = PageTerms()
+    for text in texts:
+        collected.add(text)
+    return collected.terms
+
+def term_shard(term, shards):
+    # 32-bit FNV-1a over the UTF-8 bytes, simple to repeat in the browser
+    digest = 0x811C9DC5
+    for byte in term.encode("utf-8"):
+        digest = ((digest ^ byte) * 0x01000193) & 0xFFFFFFFF
+    return digest % shards
+
+class SearchIndex:
+    # Postings are flat arrays of unsigned ints per term:
+    # page id, position count, positions... for each page containing it.
+    # That is a few bytes per word, well under the text it came from.
+    def __init__(self, dir_path, basepath="/", shards=16):
+        self.dir_path = dir_path
+        self.basepath = basepath if isinstance(basepath, str) else "/"
+        self.shards = shards
+        self.pages = []
+        self.ids = {}
+        self.postings = {}
+
+    @classmethod
+    def load(cls, dest_dir_path, basepath="/", shards=16):
+        # Reads the index a previous build wrote, so an incremental build
+        # only has to replace the pages it re-rendered. shards=None keeps
+        # the shard count it was saved with.
+        dir_path = os.path.join(dest_dir_path, SEARCH_DIR)
+        index = cls(dir_path, basepath, shards)
+        try:
+            with open(os.path.join(dir_path, "meta.json"), "r") as file:
+                meta = json.load(file)
+            if meta.get("version") != SEARCH_VERSION:
+                return index
+            if shards is None:
+                index.shards = meta["shards"]
+
+            with open(os.path.join(dir_path, "pages.json"), "r") as file:
+                pages = json.load(file)
+            index.pages = [
+                (os.path.normpath(os.path.join(dest_dir_path, page["output"])), page["url"], page["title"])
+                for page in pages
+            ]
+            index.ids = {page[0]: page_id for page_id, page in enumerate(index.pages)}
+
+            for shard in range(meta["shards"]):
+                with open(os.path.join(dir_path, f"index-{shard}.json"), "r") as file:
+                    for term, entries in json.load(file).items():
+                        postings = index.postings.setdefault(term, array("I"))
+                        for page_id, deltas in entries:
+                            postings.append(page_id)
+                            postings.append(len(deltas))
+                            position = 0
+                            for delta in deltas:
+                                position += delta
+                                postings.append(position)
+        except (OSError, ValueError, KeyError, TypeError):
+            return cls(dir_path, basepath, shards)
+
+        return index
+
+    def add_page(self, info):
+        # Takes the terms out of the page info, so they are dropped as
+        # soon as they are merged in
+        terms = info.pop("terms", None)
+        if terms is None:
+            return
+
+        # A re-rendered page gets a new id; postings under the old one are
+        # dropped when the index is saved
+        output = os.path.normpath(info["output"])
+        page_id = len(self.pages)
+        self.pages.append((output, self.page_url(info["output"]), info["title"]))
+        self.ids[output] = page_id
+
+        for term, positions in terms.items():
+            postings = self.postings.get(term)
+            if postings is None:
+                postings = self.postings[term] = array("I")
+            postings.append(page_id)
+            postings.append(len(positions))
+            postings.extend(positions)
+
+    def merge(self, other):
+        # Adds the live pages of another index, such as one shard's, under
+        # new ids; outputs are moved from other's site directory to this one
+        other_root = os.path.dirname(other.dir_path)
+        root = os.path.dirname(self.dir_path)
+        renumber = {}
+        for output, page_id in other.ids.items():
+            output = os.path.normpath(os.path.join(root, os.path.relpath(output, other_root)))
+            _, url, title = other.pages[page_id]
+            renumber[page_id] = self.ids[output] = len(self.pages)
+            self.pages.append((output, url, title))
+
+        for term, postings in other.postings.items():
+            merged = self.postings.get(term)
+            if merged is None:
+                merged = self.postings[term] = array("I")
+            i = 0
+            while i < len(postings):
+                start = i + 2
+                end = start + postings[i + 1]
+                new_id = renumber.get(postings[i])
+                if new_id is not None:
+                    merged.append(new_id)
+                    merged.append(postings[i + 1])
+                    merged.extend(postings[start:end])
+                i = end
+
+    def __contains__(self, output):
+        return os.path.normpath(output) in self.ids
+
+    def page_url(self, output):
+        page_dir = os.path.relpath(os.path.dirname(output), os.path.dirname(self.dir_path))
+        if page_dir == ".":
+            return self.basepath
+        return self.basepath + page_dir.replace(os.sep, "/") + "/"
+
+    def retain(self, outputs):
+        outputs = {os.path.normpath(output) for output in outputs}
+        for output in [output for output in self.ids if output not in outputs]:
+            del self.ids[output]
+
+    def save(self):
+        # Live pages are renumbered in URL order and terms are written in
+        # sorted order, so the same site always gives the same files
+        os.makedirs(self.dir_path, exist_ok=True)
+        live = sorted(self.ids.values(), key=lambda page_id: self.pages[page_id][1])
+        renumber = {page_id: new_id for new_id, page_id in enumerate(live)}
+        root = os.path.dirname(self.dir_path)
+
+        with open(os.path.join(self.dir_path, "pages.json"), "w") as file:
+            json.dump(
+                [
+                    {
+                        "url": self.pages[page_id][1],
+                        "title": self.pages[page_id][2],
+                        # Relative to the site, so a shard's index can be
+                        # merged into a site built somewhere else
+                        "output": os.path.relpath(self.pages[page_id][0], root).replace(os.sep, "/"),
+                    }
+                    for page_id in live
+                ],
+                file,
+                separators=(",", ":"),
+            )
+
+        by_shard = [[] for _ in range(self.shards)]
+        for term in sorted(self.postings):
+            by_shard[term_shard(term, self.shards)].append(term)
+
+        terms = 0
+        for shard, shard_terms in enumerate(by_shard):
+            entries = {}
+            for term in shard_terms:
+                postings = self.decode(self.postings[term], renumber)
+                if postings:
+                    entries[term] = postings
+            terms += len(entries)
+            with open(os.path.join(self.dir_path, f"index-{shard}.json"), "w") as file:
+                json.dump(entries, file, separators=(",", ":"))
+
+        with open(os.path.join(self.dir_path, "meta.json"), "w") as file:
+            json.dump(
+                {"version": SEARCH_VERSION, "shards": self.shards, "hash": "fnv1a32", "pages": len(live), "terms": terms},
+                file,
+            )
+
+        for shard in range(self.shards, self.shards + 64):
+            stale = os.path.join(self.dir_path, f"index-{shard}.json")
+            if not os.path.exists(stale):
+                break
+            os.remove(stale)
+
+    def decode(self, postings, renumber):
+        # [[page id, [position deltas]], ...] sorted by page id, skipping
+        # pages that were removed or re-rendered since
+        entries = []
+        i = 0
+        while i < len(postings):
+            page_id = postings[i]
+            count = postings[i + 1]
+            start = i + 2
+            i = start + count
+            new_id = renumber.get(page_id)
+            if new_id is None:
+                continue
+
+            deltas = []
+            previous = 0
+            for position in postings[start:i]:
+                deltas.append(position - previous)
+                previous = position
+            entries.append([new_id, deltas])
+
+        entries.sort()
+        return entries
@@ -0,0 +1,227 @@
+import os
+import json
+import shutil
+import hashlib
+from depgraph import DependencyGraph, DEPGRAPH_NAME
+from searchindex import SearchIndex, SEARCH_DIR
+from sitemap import has_site_index, count_entries, merge_site_indexes
+
+SHARD_MANIFEST_NAME = ".shard.json"
+
+class ShardError(Exception):
+    pass
+
+def shard_for(relpath, count):
+    # A content hash rather than hash(), which is salted per process, so
+    # every host agrees on the partition
+    key = relpath.replace(os.sep, "/").encode("utf-8")
+    digest = hashlib.blake2b(key, digest_size=8).digest()
+    return int.from_bytes(digest, "big") % count
+
+class Shard:
+    def __init__(self, index, count):
+        if count < 1 or not 0 <= index < count:
+            raise ValueError(f"invalid shard {index} of {count}")
+        self.index = index
+        self.count = count
+
+    def owns(self, relpath):
+        return shard_for(relpath, self.count) == self.index
+
+    def __repr__(self):
+        return f"Shard({self.index}/{self.count})"
+
+def walk_files(dir_path):
+    # Relative paths of every file under dir_path, in sorted order
+    paths = []
+    for root, dirs, files in os.walk(dir_path):
+        dirs.sort()
+        for name in sorted(files):
+            paths.append(os.path.relpath(os.path.join(root, name), dir_path).replace(os.sep, "/"))
+    return paths
+
+def page_output(relpath):
+    # Same mapping as collect_pages: every file in a directory renders to
+    # that directory's index.html. Pages are partitioned by output path so
+    # files sharing an output always land on the same shard.
+    page_dir = os.path.dirname(relpath)
+    return page_dir + "/index.html" if page_dir else "index.html"
+
+def walk_key(relpath):
+    # Sorting by path components gives the order collect_pages walks the
+    # content in: each directory's entries by name, subdirectories in place
+    return relpath.split("/")
+
+def shard_assignment(shard, dir_path_content, dir_path_static):
+    pages = [path for path in walk_files(dir_path_content) if shard.owns(page_output(path))]
+    static = [path for path in walk_files(dir_path_static) if shard.owns(path)]
+    return {
+        "index": shard.index,
+        "count": shard.count,
+        "pages": pages,
+        "static": static,
+        "outputs": sorted({page_output(path) for path in pages} | set(static)),
+    }
+
+def write_shard_manifest(dest_dir_path, shard, dir_path_content, dir_path_static):
+    assignment = shard_assignment(shard, dir_path_content, dir_path_static)
+    with open(os.path.join(dest_dir_path, SHARD_MANIFEST_NAME), "w") as file:
+        json.dump(assignment, file, indent=1)
+    return assignment
+
+def load_shard_manifest(shard_dir):
+    path = os.path.join(shard_dir, SHARD_MANIFEST_NAME)
+    try:
+        with open(path, "r") as file:
+            return json.load(file)
+    except (OSError, ValueError) as e:
+        raise ShardError(f"{shard_dir}: no readable shard manifest ({e})") from e
+
+def check_coverage(manifests, dir_path_content=None, dir_path_static=None):
+    counts = {manifest["count"] for manifest in manifests}
+    if len(counts) != 1:
+        raise ShardError(f"shards disagree on the shard count: {sorted(counts)}")
+
+    count = counts.pop()
+    indices = sorted(manifest["index"] for manifest in manifests)
+    if indices != list(range(count)):
+        raise ShardError(f"expected shards 0..{count - 1} once each, got {indices}")
+
+    expected = {
+        "pages": set(walk_files(dir_path_content)) if dir_path_content is not None else None,
+        "static": set(walk_files(dir_path_static)) if dir_path_static is not None else None,
+        "outputs": None,
+    }
+    for field, wanted in expected.items():
+        owners = {}
+        for manifest in manifests:
+            for path in manifest[field]:
+                if path in owners:
+                    raise ShardError(f"{path} is in both shard {owners[path]} and shard {manifest['index']}")
+                owners[path] = manifest["index"]
+
+        if wanted is None:
+            continue
+
+        missing = sorted(wanted - owners.keys())
+        extra = sorted(owners.keys() - wanted)
+        if missing:
+            raise ShardError(f"{len(missing)} {field} not built by any shard, e.g. {missing[0]}")
+        if extra:
+            raise ShardError(f"{len(extra)} {field} built by shards but no longer in the source, e.g. {extra[0]}")
+
+def merge_shards(shard_dirs, dest_dir_path, dir_path_content=None, dir_path_static=None):
+    manifests = [load_shard_manifest(shard_dir) for shard_dir in shard_dirs]
+    check_coverage(manifests, dir_path_content, dir_path_static)
+
+    # Validation is done before anything is written, so a bad shard set
+    # never touches the existing site
+    for shard_dir, manifest in zip(shard_dirs, manifests):
+        for relpath in manifest["outputs"]:
+            if not os.path.isfile(os.path.join(shard_dir, relpath)):
+                raise ShardError(f"shard {manifest['index']} is missing its output {relpath}")
+    search_indexes = load_search_indexes(shard_dirs, manifests)
+    site_indexes = check_site_indexes(shard_dirs, manifests)
+
+    # Everything is merged into a sibling directory that replaces
+    # dest_dir_path only once complete, so a failure part way keeps the old
+    # site, and dest_dir_path may itself be one of the shards
+    dest_dir_path = os.path.normpath(dest_dir_path)
+    work_dir = dest_dir_path + ".merging"
+    if os.path.exists(work_dir):
+        shutil.rmtree(work_dir)
+    os.makedirs(work_dir)
+    try:
+        merged = merge_outputs(shard_dirs, manifests, work_dir, search_indexes, site_indexes)
+    except BaseException:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        raise
+
+    replace_dir(work_dir, dest_dir_path)
+    return merged
+
+def load_search_indexes(shard_dirs, manifests):
+    # Every shard's search index, or None when the shards were built
+    # without one; each must cover exactly the pages its shard rendered
+    built = [os.path.exists(os.path.join(shard_dir, SEARCH_DIR, "meta.json")) for shard_dir in shard_dirs]
+    if not any(built):
+        return None
+    if not all(built):
+        missing = [manifest["index"] for manifest, has in zip(manifests, built) if not has]
+        raise ShardError(f"shards {missing} have no search index but the others do")
+
+    indexes = []
+    for shard_dir, manifest in zip(shard_dirs, manifests):
+        index = SearchIndex.load(shard_dir, shards=None)
+        pages = {page_output(path) for path in manifest["pages"]}
+        found = {os.path.relpath(output, shard_dir).replace(os.sep, "/") for output in index.ids}
+        if found != pages:
+            raise ShardError(
+                f"shard {manifest['index']}'s search index covers {len(found & pages)} of its {len(pages)} pages"
+            )
+        indexes.append(index)
+    return indexes
+
+def check_site_indexes(shard_dirs, manifests):
+    # (shard dir, entry keys) for every shard's sitemap and feed, or None
+    # when the shards were built without --site-url
+    built = [has_site_index(shard_dir) for shard_dir in shard_dirs]
+    if not any(built):
+        return None
+    if not all(built):
+        missing = [manifest["index"] for manifest, has in zip(manifests, built) if not has]
+        raise ShardError(f"shards {missing} have no sitemap and feed but the others do")
+
+    sources = []
+    for shard_dir, manifest in zip(shard_dirs, manifests):
+        # One entry per output page, listed where its last source is walked
+        listed = {}
+        for path in sorted(manifest["pages"], key=walk_key):
+            listed[page_output(path)] = path
+        keys = sorted(walk_key(path) for path in listed.values())
+        for name, count in count_entries(shard_dir).items():
+            if count != len(keys):
+                raise ShardError(f"shard {manifest['index']}'s {name} lists {count} of its {len(keys)} pages")
+        sources.append((shard_dir, keys))
+    return sources
+
+def merge_outputs(shard_dirs, manifests, dest_dir_path, search_indexes=None, site_indexes=None):
+    depgraph = DependencyGraph(os.path.join(dest_dir_path, DEPGRAPH_NAME))
+    merged = 0
+    for shard_dir, manifest in zip(shard_dirs, manifests):
+        for relpath in manifest["outputs"]:
+            dst = os.path.join(dest_dir_path, relpath)
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            shutil.copy2(os.path.join(shard_dir, relpath), dst)
+            merged += 1
+
+        shard_graph = DependencyGraph.load(shard_dir)
+        for output, inputs in shard_graph.inputs.items():
+            depgraph.record(output, inputs)
+
+    if depgraph.inputs:
+        depgraph.save()
+
+    if search_indexes is not None:
+        search_index = SearchIndex(os.path.join(dest_dir_path, SEARCH_DIR), shards=search_indexes[0].shards)
+        for shard_index in search_indexes:
+            search_index.merge(shard_index)
+        search_index.save()
+
+    if site_indexes is not None:
+        merge_site_indexes(site_indexes, dest_dir_path)
+    return merged
+
+def replace_dir(src, dest):
+    # Two renames, since os.replace will not move a directory over a
+    # non-empty one; the old tree is only deleted once the new one is in place
+    if not os.path.exists(dest):
+        os.replace(src, dest)
+        return
+
+    old = dest + ".old"
+    if os.path.exists(old):
+        shutil.rmtree(old)
+    os.replace(dest, old)
+    os.replace(src, dest)
+    shutil.rmtree(old)
@@ -0,0 +1,148 @@
+import os
+import heapq
+import filecmp
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from xml.sax.saxutils import escape
+
+SITEMAP_NAME = "sitemap.xml"
+FEED_NAME = "feed.xml"
+
+# Each entry is written on a line of its own, between a head and a tail,
+# so shard outputs can be merged line by line
+SITEMAP_HEAD = '<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+SITEMAP_TAIL = "</urlset>\n"
+FEED_TAIL = "</channel>\n</rss>\n"
+ENTRY_FORMATS = ((SITEMAP_NAME, "<url>", SITEMAP_TAIL), (FEED_NAME, "<item>", FEED_TAIL))
+
+class SiteIndexWriter:
+    # Writes sitemap.xml and an RSS feed one entry at a time, in the order
+    # pages are added, so memory does not grow with the site. A file whose
+    # content came out the same is left untouched.
+    def __init__(self, dest_dir_path, site_url, basepath="/", title=None, description=""):
+        self.dest_dir_path = dest_dir_path
+        self.root_url = site_url.rstrip("/") + (basepath if isinstance(basepath, str) else "/")
+        self.entries = 0
+        self.sitemap = open(self.temp_path(SITEMAP_NAME), "w")
+        self.feed = open(self.temp_path(FEED_NAME), "w")
+
+        self.sitemap.write(SITEMAP_HEAD)
+        self.feed.write(
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<rss version="2.0">\n<channel>\n'
+            f"<title>{escape(title or self.root_url)}</title>\n"
+            f"<link>{escape(self.root_url)}</link>\n"
+            f"<description>{escape(description)}</description>\n"
+        )
+
+    def temp_path(self, name):
+        return os.path.join(self.dest_dir_path, name + ".tmp")
+
+    def page_url(self, output):
+        page_dir = os.path.relpath(os.path.dirname(output), self.dest_dir_path)
+        if page_dir == ".":
+            return self.root_url
+        return self.root_url + page_dir.replace(os.sep, "/") + "/"
+
+    def add(self, output, source, title, meta):
+        url = escape(self.page_url(output))
+        updated = page_date(source, meta.get("updated") or meta.get("date"))
+        published = page_date(source, meta.get("date"))
+
+        self.sitemap.write(f"<url><loc>{url}</loc><lastmod>{updated.date().isoformat()}</lastmod></url>\n")
+        self.feed.write(
+            f"<item><title>{escape(title or '')}</title><link>{url}</link>"
+            f'<guid isPermaLink="true">{url}</guid>'
+            f"<pubDate>{format_datetime(published)}</pubDate>"
+        )
+        if meta.get("summary"):
+            self.feed.write(f"<description>{escape(str(meta['summary']))}</description>")
+        self.feed.write("</item>\n")
+        self.entries += 1
+
+    def close(self):
+        self.sitemap.write(SITEMAP_TAIL)
+        self.feed.write(FEED_TAIL)
+        self.sitemap.close()
+        self.feed.close()
+        return [name for name in (SITEMAP_NAME, FEED_NAME) if self.replace(name)]
+
+    def abort(self):
+        for file, name in ((self.sitemap, SITEMAP_NAME), (self.feed, FEED_NAME)):
+            file.close()
+            if os.path.exists(self.temp_path(name)):
+                os.remove(self.temp_path(name))
+
+    def replace(self, name):
+        temp = self.temp_path(name)
+        final = os.path.join(self.dest_dir_path, name)
+        if os.path.exists(final) and filecmp.cmp(temp, final, shallow=False):
+            os.remove(temp)
+            return False
+
+        os.replace(temp, final)
+        return True
+
+def page_date(source_path, value=None):
+    # A front matter date (YYYY-MM-DD, or a full ISO timestamp) wins over
+    # the file's mtime, which changes on every fresh checkout
+    if isinstance(value, str):
+        try:
+            date = datetime.fromisoformat(value)
+        except ValueError:
+            date = None
+        if date is not None:
+            return date if date.tzinfo is not None else date.replace(tzinfo=timezone.utc)
+
+    return datetime.fromtimestamp(os.stat(source_path).st_mtime, timezone.utc)
+
+def has_site_index(dir_path):
+    return os.path.exists(os.path.join(dir_path, SITEMAP_NAME)) and os.path.exists(os.path.join(dir_path, FEED_NAME))
+
+def count_entries(dir_path):
+    # Entries per file, e.g. {"sitemap.xml": 12, "feed.xml": 12}
+    counts = {}
+    for name, prefix, _ in ENTRY_FORMATS:
+        with open(os.path.join(dir_path, name), "r") as file:
+            counts[name] = sum(1 for line in file if line.startswith(prefix))
+    return counts
+
+def merge_site_indexes(sources, dest_dir_path):
+    # sources are (dir_path, keys): a directory holding one part of the
+    # site's sitemap and feed, and the sort key of each of its entries in
+    # the order they were written. Entries are merged by key a line at a
+    # time, so memory does not grow with the site.
+    for name, prefix, tail in ENTRY_FORMATS:
+        files = [open(os.path.join(dir_path, name), "r") for dir_path, _ in sources]
+        try:
+            heads = []
+            streams = []
+            for file, (_, keys) in zip(files, sources):
+                head, entries = split_entries(file, prefix)
+                heads.append(head[:-len(tail)] if head.endswith(tail) else head)
+                streams.append(zip(keys, entries))
+
+            with open(os.path.join(dest_dir_path, name), "w") as out:
+                out.write(heads[0])
+                for _, line in heapq.merge(*streams, key=lambda entry: entry[0]):
+                    out.write(line)
+                out.write(tail)
+        finally:
+            for file in files:
+                file.close()
+
+def split_entries(file, prefix):
+    # The text before the first entry, and an iterator over the entry lines
+    head = []
+    for line in file:
+        if line.startswith(prefix):
+            return "".join(head), iter_entries(line, file, prefix)
+        head.append(line)
+    return "".join(head), iter(())
+
+def iter_entries(first, file, prefix):
+    yield first
+    for line in file:
+        if not line.startswith(prefix):
+            return
+        yield line
@@ -0,0 +1,31 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as file:
+        file.write(text)
+
+
+def read(path):
+    with open(path) as file:
+        return file.read()
+
+
+class SiteTestCase(unittest.TestCase):
+    # A scratch site under a temporary root: content/, static/, an empty
+    # out/ and template.html. Subclasses add their pages after super().setUp().
+    template_text = "<title>{{ Title }}</title>{{ Content }}"
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.content = os.path.join(self.root, "content")
+        self.static = os.path.join(self.root, "static")
+        self.out = os.path.join(self.root, "out")
+        self.template = os.path.join(self.root, "template.html")
+        os.mkdir(self.out)
+        write(self.template, self.template_text)
@@ -0,0 +1,59 @@
+import re
+from htmlnode import escape_text
+
+placeholder_pattern = re.compile(r"\{\{ (Title|Content) \}\}")
+root_url_pattern = re.compile(r"""((?:href|src)=["'])/(?!/)""")
+template_url_pattern = re.compile(r"""(?:href|src)=["'](/(?!/)[^"']*)""")
+
+def rebase_html(html, basepath):
+    # Only the template's own markup is rewritten this way, once per build;
+    # page content is rebased as its nodes are emitted
+    return root_url_pattern.sub(lambda m: m.group(1) + basepath, html)
+
+class Template:
+    def __init__(self, text, basepath="/"):
+        self.basepath = basepath
+        # re.split with one capture group alternates literal, slot, literal...
+        parts = placeholder_pattern.split(text)
+        # Root-relative URLs in the markup itself, as written (not rebased)
+        self.urls = template_url_pattern.findall(text)
+        self.literals = parts[0::2]
+        if isinstance(basepath, str):
+            self.literals = [rebase_html(part, basepath) for part in self.literals]
+        self.slots = parts[1::2]
+
+    @classmethod
+    def load(cls, template_path, basepath="/"):
+        with open(template_path, "r") as file:
+            return cls(file.read(), basepath)
+
+    def render(self, title, node):
+        parts = []
+        self.render_to(parts.append, title, node)
+        return "".join(parts)
+
+    def fill(self, title, content):
+        # For content that has already been rendered to a string
+        title = escape_text(title)
+        parts = [self.literals[0]]
+        for slot, literal in zip(self.slots, self.literals[1:]):
+            parts.append(title if slot == "Title" else content)
+            parts.append(literal)
+        return "".join(parts)
+
+    def write(self, file, title, node):
+        self.render_to(file.write, title, node)
+
+    def render_to(self, write, title, node):
+        # The title is page text, escaped like the same text in the <h1>
+        title = escape_text(title)
+        write(self.literals[0])
+        for slot, literal in zip(self.slots, self.literals[1:]):
+            if slot == "Title":
+                write(title)
+            else:
+                node.render(write, self.basepath)
+            write(literal)
+
+    def __repr__(self):
+        return f"Template({self.slots}, {self.basepath})"
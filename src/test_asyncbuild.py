@@ -0,0 +1,116 @@
+import os
+import threading
+import time
+import unittest
+
+from asyncbuild import run_pipeline
+from gencontent import generate_pages_recursive, PageError
+from sitetest import SiteTestCase, write, read
+
+
+class TestRunPipeline(unittest.TestCase):
+    def test_renders_in_order_and_writes_everything(self):
+        pages = [(f"in{i}", f"out{i}") for i in range(50)]
+        written = {}
+        rendered = []
+
+        def render(from_path, text):
+            rendered.append(from_path)
+            return text.upper()
+
+        def write(path, text):
+            written[path] = text
+
+        run_pipeline(pages, render, read=lambda path: path, write=write)
+        self.assertEqual(rendered, [from_path for from_path, _ in pages])
+        self.assertEqual(written, {f"out{i}": f"IN{i}" for i in range(50)})
+
+    def test_read_ahead_is_bounded(self):
+        lock = threading.Lock()
+        state = {"pending": 0, "max": 0}
+        pages = [(f"in{i}", f"out{i}") for i in range(40)]
+
+        def read(path):
+            with lock:
+                state["pending"] += 1
+                state["max"] = max(state["max"], state["pending"])
+            return path
+
+        def render(from_path, text):
+            with lock:
+                state["pending"] -= 1
+            return text
+
+        run_pipeline(pages, render, read_ahead=4, read=read, write=lambda path, text: None)
+        # The queue holds read_ahead reads, plus one waiting to be queued
+        self.assertLessEqual(state["max"], 6)
+
+    def test_errors_propagate(self):
+        def render(from_path, text):
+            raise ValueError(f"bad {from_path}")
+
+        with self.assertRaisesRegex(ValueError, "bad in0"):
+            run_pipeline([("in0", "out0")], render, read=lambda path: path, write=lambda path, text: None)
+
+    def test_failed_write_propagates_and_is_not_reported(self):
+        pages = [(f"in{i}", f"out{i}") for i in range(10)]
+        reported = []
+
+        def write(path, text):
+            if path == "out0":
+                raise OSError("disk full")
+            time.sleep(0.01)
+
+        with self.assertRaisesRegex(OSError, "disk full"):
+            run_pipeline(
+                pages,
+                lambda from_path, text: text,
+                read=lambda path: path,
+                write=write,
+                on_page=lambda from_path, dest_path: reported.append(dest_path),
+            )
+        self.assertNotIn("out0", reported)
+
+    def test_pages_are_reported_in_order_after_their_write(self):
+        pages = [(f"in{i}", f"out{i}") for i in range(20)]
+        written = set()
+        reported = []
+
+        def write(path, text):
+            # Early pages finish last
+            time.sleep(0.001 * (20 - int(path[3:])))
+            written.add(path)
+
+        def on_page(from_path, dest_path):
+            self.assertIn(dest_path, written)
+            reported.append(dest_path)
+
+        run_pipeline(pages, lambda from_path, text: text, read=lambda path: path, write=write, on_page=on_page)
+        self.assertEqual(reported, [dest_path for _, dest_path in pages])
+
+
+class TestAsyncBuild(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        for name in ["a", "b", "c"]:
+            write(os.path.join(self.content, name, "index.md"), f"# {name}\n\n[home](/) _{name}_")
+
+    def read(self, out, name):
+        return read(os.path.join(self.root, out, name, "index.html"))
+
+    def test_matches_serial_build(self):
+        generate_pages_recursive(self.content, self.template, os.path.join(self.root, "serial"), "/x/")
+        generate_pages_recursive(self.content, self.template, os.path.join(self.root, "async"), "/x/", io_workers=2)
+        for name in ["a", "b", "c"]:
+            self.assertEqual(self.read("serial", name), self.read("async", name))
+
+    def test_error_names_source(self):
+        bad_path = os.path.join(self.content, "b", "index.md")
+        write(bad_path, "no title")
+        with self.assertRaises(PageError) as cm:
+            generate_pages_recursive(self.content, self.template, self.out, "/", io_workers=2)
+        self.assertIn(bad_path, str(cm.exception))
+
+
+if __name__ == "__main__":
+    unittest.main()
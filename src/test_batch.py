@@ -0,0 +1,61 @@
+import unittest
+
+from batch import BatchRenderer, render_batch
+from markdown_blocks import markdown_to_html_node
+from template import Template
+
+
+SNIPPETS = [
+    "# One\n\nplain [link](/a)",
+    "- a\n- b",
+    "shared **block**",
+    "shared **block**",
+    "```\ncode\n```",
+]
+
+
+class TestRenderBatch(unittest.TestCase):
+    def test_matches_single_renders_in_order(self):
+        expected = [markdown_to_html_node(md).to_html() for md in SNIPPETS]
+        self.assertEqual(render_batch(SNIPPETS), expected)
+
+    def test_basepath(self):
+        self.assertEqual(
+            render_batch(["[a](/a)"], basepath="/site/"),
+            ["<div><p><a href='/site/a'>a</a></p></div>"],
+        )
+
+    def test_template_without_title(self):
+        template = Template("<title>{{ Title }}</title>{{ Content }}")
+        self.assertEqual(
+            render_batch(["# T\n\nx", "y"], template=template),
+            ["<title>T</title><div><h1>T</h1><p>x</p></div>", "<title></title><div><p>y</p></div>"],
+        )
+
+    def test_metadata(self):
+        self.assertEqual(
+            render_batch(["# T\n\nx", "y"], metadata=True),
+            [("<div><h1>T</h1><p>x</p></div>", {"title": "T"}), ("<div><p>y</p></div>", {"title": None})],
+        )
+        with BatchRenderer(workers=2, metadata=True) as renderer:
+            self.assertEqual(renderer.render(["# A", "# B"])[1], ("<div><h1>B</h1></div>", {"title": "B"}))
+
+    def test_shared_cache(self):
+        renderer = BatchRenderer()
+        renderer.render(SNIPPETS)
+        self.assertEqual(renderer.block_cache.hits, 1)
+
+    def test_workers_keep_input_order(self):
+        snippets = [f"item **{i}**" for i in range(40)]
+        expected = render_batch(snippets)
+        with BatchRenderer(workers=2) as renderer:
+            self.assertEqual(renderer.render(snippets), expected)
+            self.assertEqual(renderer.render(reversed(snippets)), expected[::-1])
+
+    def test_errors_propagate(self):
+        with self.assertRaisesRegex(Exception, "Invalid Markdown!"):
+            render_batch(["**broken"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import os
+import tempfile
+import unittest
+
+from blockcache import BlockCache
+from htmlnode import RawNode
+from markdown_blocks import markdown_to_html_node
+from gencontent import generate_pages_recursive
+from sitetest import SiteTestCase, write
+
+
+class TestBlockCache(unittest.TestCase):
+    def test_hits_and_misses(self):
+        cache = BlockCache()
+        self.assertIsNone(cache.get("a"))
+        cache.put("a", "<p>a</p>")
+        self.assertEqual(cache.get("a"), "<p>a</p>")
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_lru_eviction(self):
+        cache = BlockCache(maxsize=2)
+        cache.put("a", "A")
+        cache.put("b", "B")
+        cache.get("a")
+        cache.put("c", "C")
+        self.assertEqual(cache.get("a"), "A")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), "C")
+
+    def test_persists_between_builds(self):
+        with tempfile.TemporaryDirectory() as dir_path:
+            path = os.path.join(dir_path, "cache.json")
+            cache = BlockCache("/site/", path=path)
+            cache.put("a", "A")
+            cache.save()
+
+            self.assertEqual(BlockCache("/site/", path=path).get("a"), "A")
+            self.assertIsNone(BlockCache("/other/", path=path).get("a"))
+
+
+class TestCachedMarkdownToHTMLNode(unittest.TestCase):
+    def test_same_output_and_reuse(self):
+        md = "# Title\n\nshared [link](/a) **block**\n\n- x\n- y\n\nshared [link](/a) **block**"
+        cache = BlockCache("/site/")
+        expected = markdown_to_html_node(md).to_html("/site/")
+        self.assertEqual(markdown_to_html_node(md, cache).to_html("/site/"), expected)
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(markdown_to_html_node(md, cache).to_html("/site/"), expected)
+        self.assertEqual(cache.hits, 5)
+
+    def test_raw_node_rejects_other_basepath(self):
+        node = RawNode("<a href='/site/a'></a>", "/site/")
+        self.assertEqual(node.to_html("/site/"), "<a href='/site/a'></a>")
+        with self.assertRaises(ValueError):
+            node.to_html("/")
+
+
+class TestParallelBlockCache(SiteTestCase):
+    def test_workers_send_entries_and_counts_back(self):
+        for i in range(6):
+            write(os.path.join(self.content, f"p{i}", "index.md"), f"# Page {i}\n\nshared **block**\n\nown {i}")
+
+        serial = BlockCache("/")
+        generate_pages_recursive(self.content, self.template, self.out, "/", block_cache=serial)
+        parallel = BlockCache("/")
+        generate_pages_recursive(self.content, self.template, self.out, "/", workers=2, block_cache=parallel)
+
+        self.assertEqual(set(parallel.entries), set(serial.entries))
+        self.assertEqual(parallel.hits + parallel.misses, serial.hits + serial.misses)
+        self.assertGreater(parallel.hits, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import os
+import unittest
+
+from copystatic import copy_files_recursive
+from sitetest import SiteTestCase, write, read
+
+
+class TestCopyFilesRecursive(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.src = self.static
+        self.dst = self.out
+        for path, text in [("index.css", "body {}"), ("images/a.png", "png")]:
+            write(os.path.join(self.src, path), text)
+
+    def read(self, path):
+        return read(os.path.join(self.dst, path))
+
+    def test_copies_tree(self):
+        stats = copy_files_recursive(self.src, self.dst)
+        self.assertEqual(stats["copied"], 2)
+        self.assertEqual(self.read("images/a.png"), "png")
+
+    def test_skips_unchanged(self):
+        copy_files_recursive(self.src, self.dst)
+        stats = copy_files_recursive(self.src, self.dst)
+        self.assertEqual(stats["copied"], 0)
+        self.assertEqual(stats["skipped"], 2)
+
+    def test_hash_compare_detects_same_size_edit(self):
+        copy_files_recursive(self.src, self.dst, compare="hash")
+        write(os.path.join(self.src, "index.css"), "body []")
+        stats = copy_files_recursive(self.src, self.dst, compare="hash")
+        self.assertEqual(stats["copied"], 1)
+        self.assertEqual(self.read("index.css"), "body []")
+
+    def test_hardlink(self):
+        stats = copy_files_recursive(self.src, self.dst, link="hardlink")
+        self.assertEqual(stats["linked"], 2)
+        self.assertTrue(
+            os.path.samefile(os.path.join(self.src, "index.css"), os.path.join(self.dst, "index.css"))
+        )
+
+    def test_reflink_falls_back_to_copy(self):
+        copy_files_recursive(self.src, self.dst, link="reflink")
+        self.assertEqual(self.read("index.css"), "body {}")
+
+    def test_invalid_link_mode(self):
+        with self.assertRaises(ValueError):
+            copy_files_recursive(self.src, self.dst, link="symlink")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import os
+import tempfile
+import unittest
+
+from corpus import synthetic_page, write_corpus
+from markdown_blocks import markdown_to_html_node
+from benchmark import STAGES, parse_args, run, run_once
+from template import Template
+
+
+class TestSyntheticPage(unittest.TestCase):
+    def test_deterministic(self):
+        self.assertEqual(synthetic_page(3, seed=7), synthetic_page(3, seed=7))
+        self.assertNotEqual(synthetic_page(3, seed=7), synthetic_page(4, seed=7))
+
+    def test_renders(self):
+        page = synthetic_page(0, page_size=10, link_density=0.5, list_length=3, code_lines=2)
+        html = markdown_to_html_node(page).to_html()
+        self.assertIn("<ol>", html)
+        self.assertIn("<pre><code>", html)
+
+    def test_link_density(self):
+        sparse = synthetic_page(0, link_density=0.0, pages=10)
+        dense = synthetic_page(0, link_density=0.6, pages=10)
+        self.assertEqual(sparse.count("](/page-"), 0)
+        self.assertGreater(dense.count("](/page-"), 50)
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_report_has_every_stage(self):
+        with tempfile.TemporaryDirectory() as dir_path:
+            template = os.path.join(dir_path, "template.html")
+            with open(template, "w") as file:
+                file.write("<title>{{ Title }}</title>{{ Content }}")
+            args = parse_args(["--pages", "3", "--page-size", "5", "--repeat", "1", "--template", template])
+            report = run(args)
+        self.assertEqual(list(report["stages"]), list(STAGES))
+        self.assertEqual(report["config"]["pages"], 3)
+
+    def test_stages_produce_the_rendered_pages(self):
+        # The template stage fills in strings from the render stage; the
+        # pages it writes must match rendering the tree through the template
+        with tempfile.TemporaryDirectory() as dir_path:
+            paths = write_corpus(os.path.join(dir_path, "content"), pages=2, page_size=5)
+            out_dir = os.path.join(dir_path, "out")
+            os.mkdir(out_dir)
+            template = Template("<title>{{ Title }}</title>{{ Content }}", "/")
+            run_once(paths, template, out_dir)
+            for i, path in enumerate(paths):
+                with open(path) as file:
+                    expected = template.render(f"Page {i}", markdown_to_html_node(file.read()))
+                with open(os.path.join(out_dir, f"page-{i}.html")) as file:
+                    self.assertEqual(file.read(), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
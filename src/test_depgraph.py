@@ -0,0 +1,156 @@
+import os
+import shutil
+import unittest
+from unittest import mock
+
+from depgraph import DependencyGraph, DEPGRAPH_NAME, url_key, changed_keys
+from gencontent import generate_pages_recursive, write_page
+import gencontent
+from manifest import Manifest, hash_file
+from sitetest import SiteTestCase, write
+
+
+class TestDependencyGraph(SiteTestCase):
+    template_text = '<link href="/index.css"><title>{{ Title }}</title>{{ Content }}'
+
+    def setUp(self):
+        super().setUp()
+        write(os.path.join(self.content, "index.md"), "# Home\n\n[Tom](/blog/tom/)")
+        write(
+            os.path.join(self.content, "blog", "tom", "index.md"),
+            "# Tom\n\n![tom](/images/tom.png)\n\n[home](/)",
+        )
+        write(os.path.join(self.content, "contact", "index.md"), "# Contact")
+
+    def build(self, graph, workers=1, io_workers=0):
+        return generate_pages_recursive(
+            self.content, self.template, self.out, "/", workers=workers, io_workers=io_workers, depgraph=graph
+        )
+
+    def affected_keys(self, *paths):
+        keys = []
+        for path in paths:
+            keys.extend(changed_keys(path, self.content, self.static))
+        return keys
+
+    def affected(self, graph, *paths):
+        return {os.path.relpath(output, self.out) for output in graph.affected(self.affected_keys(*paths))}
+
+    def test_url_key_normalizes(self):
+        self.assertEqual(url_key("/blog/tom/"), "url:/blog/tom")
+        self.assertEqual(url_key("/blog/tom/index.html#top"), "url:/blog/tom")
+        self.assertEqual(url_key("/blog/tom?x=1"), "url:/blog/tom")
+        self.assertEqual(url_key("/"), "url:/")
+        self.assertEqual(url_key("/index.html"), "url:/")
+
+    def test_affected_by_each_kind_of_input(self):
+        graph = DependencyGraph()
+        self.build(graph)
+        everything = {"index.html", "blog/tom/index.html", "contact/index.html"}
+
+        self.assertEqual(self.affected(graph, self.template), everything)
+        self.assertEqual(self.affected(graph, os.path.join(self.static, "index.css")), everything)
+        self.assertEqual(
+            self.affected(graph, os.path.join(self.static, "images", "tom.png")),
+            {"blog/tom/index.html"},
+        )
+        # Its own source, plus every page linking to it
+        self.assertEqual(
+            self.affected(graph, os.path.join(self.content, "blog", "tom", "index.md")),
+            {"blog/tom/index.html", "index.html"},
+        )
+        self.assertEqual(
+            self.affected(graph, os.path.join(self.content, "contact", "index.md")),
+            {"contact/index.html"},
+        )
+
+    def test_record_replaces_old_edges(self):
+        graph = DependencyGraph()
+        graph.record("a", ["x", "y"])
+        graph.record("a", ["y"])
+        self.assertEqual(graph.affected(["x"]), set())
+        self.assertEqual(graph.affected(["y"]), {"a"})
+        graph.remove("a")
+        self.assertEqual(graph.dependents, {})
+
+    def test_save_and_load(self):
+        graph = DependencyGraph.load(self.out)
+        self.build(graph)
+        graph.save()
+        self.assertTrue(os.path.exists(os.path.join(self.out, DEPGRAPH_NAME)))
+
+        loaded = DependencyGraph.load(self.out)
+        self.assertEqual(loaded.inputs, graph.inputs)
+        self.assertEqual(loaded.dependents, graph.dependents)
+
+    def test_corrupt_graph_starts_empty(self):
+        write(os.path.join(self.out, DEPGRAPH_NAME), "{not json")
+        self.assertEqual(DependencyGraph.load(self.out).inputs, {})
+
+    def test_deleted_page_is_dropped(self):
+        graph = DependencyGraph()
+        self.build(graph)
+        shutil.rmtree(os.path.join(self.content, "contact"))
+        self.build(graph)
+        self.assertEqual(
+            self.affected(graph, self.template),
+            {"index.html", "blog/tom/index.html"},
+        )
+
+    def test_incremental_build_renders_only_affected_pages(self):
+        def build(changed=None):
+            manifest = Manifest.load(self.out)
+            graph = DependencyGraph.load(self.out)
+            infos = generate_pages_recursive(
+                self.content, self.template, self.out, "/", manifest=manifest, depgraph=graph, changed=changed
+            )
+            manifest.save()
+            graph.save()
+            return {os.path.relpath(info["output"], self.out) for info in infos}
+
+        build()
+        tom = os.path.join(self.content, "blog", "tom", "index.md")
+        write(tom, "# Tom v2\n\n[home](/)")
+        with mock.patch("manifest.hash_file", wraps=hash_file) as hashed:
+            rendered = build(self.affected_keys(tom))
+        self.assertEqual(rendered, {"blog/tom/index.html", "index.html"})
+        # Unaffected pages are never hashed
+        self.assertNotIn(os.path.join(self.content, "contact", "index.md"), [c.args[0] for c in hashed.call_args_list])
+
+        # A new page is rendered, and a deleted one removed, from the list alone
+        write(os.path.join(self.content, "about", "index.md"), "# About")
+        shutil.rmtree(os.path.join(self.content, "contact"))
+        rendered = build(self.affected_keys(os.path.join(self.content, "contact", "index.md")))
+        self.assertEqual(rendered, {"about/index.html"})
+        self.assertFalse(os.path.exists(os.path.join(self.out, "contact", "index.html")))
+        self.assertEqual(build([]), set())
+
+    def test_every_render_path_reports_urls(self):
+        serial = DependencyGraph()
+        parallel = DependencyGraph()
+        pipelined = DependencyGraph()
+        self.build(serial)
+        self.build(parallel, workers=2)
+        self.build(pipelined, io_workers=2)
+        self.assertEqual(parallel.inputs, serial.inputs)
+        self.assertEqual(pipelined.inputs, serial.inputs)
+
+    def test_streamed_page_reports_urls(self):
+        src = os.path.join(self.content, "blog", "tom", "index.md")
+        dest = os.path.join(self.out, "tom.html")
+        in_memory = write_page(src, self.template, dest, "/")
+
+        threshold = gencontent.STREAM_THRESHOLD
+        gencontent.STREAM_THRESHOLD = 0
+        try:
+            streamed = write_page(src, self.template, dest, "/")
+        finally:
+            gencontent.STREAM_THRESHOLD = threshold
+        self.assertEqual(streamed, in_memory)
+        self.assertEqual(streamed["title"], "Tom")
+        self.assertEqual(streamed["images"], ["/images/tom.png"])
+        self.assertEqual(streamed["links"], ["/"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+import os
+import shutil
+import unittest
+from unittest import mock
+
+import gencontent
+from frontmatter import MetadataCache, split_front_matter, parse_front_matter, parse_value, METADATA_NAME
+from gencontent import generate_pages_recursive, write_page
+from sitetest import SiteTestCase, write
+
+
+PAGE = """---
+date: 2024-05-01
+tags: [elves, "song"]
+# a comment
+summary: 'Old: but gold'
+---
+# Tom
+
+Tom is merry.
+"""
+
+
+class TestFrontMatter(unittest.TestCase):
+    def test_split(self):
+        meta, body = split_front_matter(PAGE)
+        self.assertEqual(meta, {"date": "2024-05-01", "tags": ["elves", "song"], "summary": "Old: but gold"})
+        self.assertEqual(body, "# Tom\n\nTom is merry.\n")
+
+    def test_no_front_matter(self):
+        self.assertEqual(split_front_matter("# T\n\n---\n"), ({}, "# T\n\n---\n"))
+        # Without a closing fence it is ordinary markdown
+        self.assertEqual(split_front_matter("---\ntitle: x\n\n# T"), ({}, "---\ntitle: x\n\n# T"))
+
+    def test_invalid_block_is_markdown(self):
+        text = "---\nnot a pair\n---\n# T"
+        self.assertEqual(split_front_matter(text), ({}, text))
+        with self.assertRaises(ValueError):
+            parse_front_matter(["not a pair\n"])
+
+    def test_values(self):
+        self.assertEqual(parse_value("[]"), [])
+        self.assertEqual(parse_value('"a, b"'), "a, b")
+        self.assertEqual(parse_value("plain text"), "plain text")
+
+
+class TestMetadataCache(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        write(os.path.join(self.content, "tom", "index.md"), PAGE)
+        write(os.path.join(self.content, "index.md"), "# Home")
+
+    def test_page_with_invalid_front_matter_still_builds(self):
+        write(os.path.join(self.content, "rule", "index.md"), "---\nJust a rule\n---\n# Rule\n\nText")
+        cache = MetadataCache.load(self.out)
+        generate_pages_recursive(self.content, self.template, self.out, "/", metadata_cache=cache)
+        with open(os.path.join(self.out, "rule", "index.html")) as file:
+            self.assertIn("Just a rule", file.read())
+
+        # Same answer when read from the file rather than the render
+        for source in (cache, MetadataCache()):
+            entry = source.lookup(os.path.join(self.content, "rule", "index.md"))
+            self.assertEqual((entry["title"], entry["meta"]), ("Rule", {}))
+
+    def test_front_matter_is_not_rendered(self):
+        dest = os.path.join(self.out, "tom.html")
+        info = write_page(os.path.join(self.content, "tom", "index.md"), self.template, dest, "/")
+        with open(dest) as file:
+            self.assertEqual(file.read(), "<title>Tom</title><div><h1>Tom</h1><p>Tom is merry.</p></div>")
+        self.assertEqual(info["meta"]["tags"], ["elves", "song"])
+
+        with mock.patch.object(gencontent, "STREAM_THRESHOLD", 0):
+            streamed = write_page(os.path.join(self.content, "tom", "index.md"), self.template, dest, "/")
+        with open(dest) as file:
+            self.assertEqual(file.read(), "<title>Tom</title><div><h1>Tom</h1><p>Tom is merry.</p></div>")
+        self.assertEqual(streamed, info)
+
+    def test_build_fills_cache(self):
+        cache = MetadataCache.load(self.out)
+        generate_pages_recursive(self.content, self.template, self.out, "/", metadata_cache=cache)
+        cache.save()
+        self.assertTrue(os.path.exists(os.path.join(self.out, METADATA_NAME)))
+
+        cache = MetadataCache.load(self.out)
+        src = os.path.join(self.content, "tom", "index.md")
+        with mock.patch("builtins.open", side_effect=AssertionError("reopened")):
+            entry = cache.lookup(src)
+        self.assertEqual(entry["title"], "Tom")
+        self.assertEqual(entry["meta"]["date"], "2024-05-01")
+
+    def test_changed_file_is_reread(self):
+        cache = MetadataCache()
+        src = os.path.join(self.content, "tom", "index.md")
+        self.assertEqual(cache.lookup(src)["meta"]["summary"], "Old: but gold")
+
+        write(src, "---\nsummary: new and longer\n---\n# Tom again")
+        self.assertIsNone(cache.get(src))
+        entry = cache.lookup(src)
+        self.assertEqual((entry["title"], entry["meta"]), ("Tom again", {"summary": "new and longer"}))
+
+    def test_lookup_matches_render(self):
+        cache = MetadataCache()
+        infos = generate_pages_recursive(self.content, self.template, self.out, "/")
+        for info in infos:
+            entry = cache.lookup(info["source"])
+            self.assertEqual((entry["title"], entry["meta"]), (info["title"], info["meta"]))
+
+    def test_deleted_pages_are_dropped(self):
+        cache = MetadataCache()
+        generate_pages_recursive(self.content, self.template, self.out, "/", metadata_cache=cache)
+        shutil.rmtree(os.path.join(self.content, "tom"))
+        generate_pages_recursive(self.content, self.template, self.out, "/", metadata_cache=cache)
+        self.assertEqual(list(cache.entries), [os.path.join(self.content, "index.md")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,10 @@
+import os
 import unittest
+from unittest import mock
 
-from gencontent import extract_title
+import gencontent
+from gencontent import extract_title, generate_pages_recursive, PageError
+from sitetest import SiteTestCase, write, read
 
 
 class TestExtractTitle(unittest.TestCase):
@@ -18,6 +22,16 @@ class TestExtractTitle(unittest.TestCase):
         )
         self.assertEqual(actual, "This is a title")
 
+    def test_matches_line_scan(self):
+        for markdown in [
+            "#  spaced  \r\nbody",
+            "text\n#not a title\n# real",
+            "```\n# inside code\n```",
+            "para\n  # indented\n# last",
+            "# ",
+        ]:
+            self.assertEqual(extract_title(markdown), gencontent.find_title(markdown.split("\n")))
+
     def test_eq_long(self):
         actual = extract_title(
             """
@@ -46,5 +60,66 @@ no title
             pass
 
 
+class TestGeneratePagesParallel(SiteTestCase):
+    template_text = "<title>{{ Title }}</title><link href=\"/index.css\">{{ Content }}"
+
+    def setUp(self):
+        super().setUp()
+        for name in ["a", "b", "c", "d"]:
+            write(os.path.join(self.content, name, "index.md"), f"# Page {name}\n\n[home](/) and **{name}**")
+        write(os.path.join(self.content, "index.md"), "# Home\n\n- one\n- two")
+
+    def read_tree(self, dir_path):
+        tree = {}
+        for root, _, files in os.walk(dir_path):
+            for name in files:
+                path = os.path.join(root, name)
+                with open(path, "rb") as file:
+                    tree[os.path.relpath(path, dir_path)] = file.read()
+        return tree
+
+    def test_parallel_matches_serial(self):
+        serial = os.path.join(self.root, "serial")
+        parallel = os.path.join(self.root, "parallel")
+        generate_pages_recursive(self.content, self.template, serial, "/base/")
+        generate_pages_recursive(self.content, self.template, parallel, "/base/", workers=2)
+        self.assertEqual(self.read_tree(serial), self.read_tree(parallel))
+
+    def test_parallel_error_reports_source_path(self):
+        bad_path = os.path.join(self.content, "b", "index.md")
+        write(bad_path, "no title here")
+        with self.assertRaises(PageError) as cm:
+            generate_pages_recursive(self.content, self.template, self.out, "/", workers=2)
+        self.assertIn(bad_path, str(cm.exception))
+
+
+class TestStreamPage(SiteTestCase):
+    def tearDown(self):
+        gencontent.STREAM_THRESHOLD = 8 << 20
+
+    def build(self, out_name, threshold, io_workers=0):
+        gencontent.STREAM_THRESHOLD = threshold
+        out = os.path.join(self.root, out_name)
+        generate_pages_recursive(self.content, self.template, out, "/", io_workers=io_workers)
+        return read(os.path.join(out, "index.html"))
+
+    def test_streamed_page_matches_in_memory(self):
+        write(os.path.join(self.content, "index.md"), "intro\n\n# Big page\n\n" + "- [a](/a)\n- **b**\n\n\n1. one\n2. two\n\n" * 200)
+        self.assertEqual(self.build("memory", 8 << 20), self.build("streamed", 0))
+
+    def test_async_build_streams_large_pages(self):
+        write(os.path.join(self.content, "index.md"), "# Big page\n\n" + "- [a](/a)\n- **b**\n\n" * 200)
+        memory = self.build("memory", 8 << 20)
+        with mock.patch.object(gencontent, "read_text") as read_text:
+            self.assertEqual(self.build("streamed", 0, io_workers=2), memory)
+        read_text.assert_not_called()
+
+    def test_streamed_error_leaves_no_output(self):
+        write(os.path.join(self.content, "index.md"), "# Title\n\nfine\n\n**broken")
+        with self.assertRaises(Exception):
+            self.build("broken", 0)
+        self.assertFalse(os.path.exists(os.path.join(self.root, "broken", "index.html")))
+
+
 if __name__ == "__main__":
     unittest.main()
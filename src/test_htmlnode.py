@@ -1,3 +1,4 @@
+import io
 import unittest
 
 from htmlnode import HTMLNode, LeafNode, ParentNode
@@ -27,6 +28,10 @@ class TestHTMLNode(unittest.TestCase):
             "href='https://example.com' target='_blank'",
         )
 
+    def test_slots_no_instance_dict(self):
+        for node in [HTMLNode("p"), LeafNode("b", "x"), ParentNode("div", [])]:
+            self.assertFalse(hasattr(node, "__dict__"))
+
     def test_props_to_html_none(self):
         node = HTMLNode("p", "hello", None, None)
         self.assertEqual(node.props_to_html(), "")
@@ -56,6 +61,205 @@ class TestParentNode(unittest.TestCase):
             "<div><span><b>grandchild</b></span></div>",
         )
 
+    def test_to_html_with_props(self):
+        parent_node = ParentNode("div", [LeafNode(None, "text")], {"class": "box"})
+        self.assertEqual(parent_node.to_html(), "<div class='box'>text</div>")
+
+    def test_to_html_no_children_raises(self):
+        with self.assertRaises(ValueError):
+            ParentNode("div", None).to_html()
+
+
+class TestURLRewriting(unittest.TestCase):
+    def test_basepath_rebases_root_relative_links(self):
+        node = LeafNode("a", "docs", {"href": "/docs"})
+        self.assertEqual(node.to_html("/site/"), "<a href='/site/docs'>docs</a>")
+
+    def test_basepath_skips_absolute_and_protocol_relative(self):
+        node = ParentNode(
+            "p",
+            [
+                LeafNode("a", "x", {"href": "https://example.com/"}),
+                LeafNode("img", "", {"src": "//cdn.example.com/a.png"}),
+                LeafNode("a", "y", {"href": "page"}),
+            ],
+        )
+        self.assertEqual(node.to_html("/site/"), node.to_html())
+
+    def test_only_a_href_and_img_src(self):
+        node = ParentNode("div", [LeafNode("span", "s", {"src": "/x"})], {"href": "/y"})
+        self.assertEqual(node.to_html("/site/"), "<div href='/y'><span src='/x'>s</span></div>")
+
+    def test_callable_rewriter(self):
+        def rewrite(tag, prop, url):
+            return url.replace("http://", "https://")
+
+        node = ParentNode(
+            "p",
+            [
+                LeafNode("a", "x", {"href": "http://example.com"}),
+                LeafNode("img", "", {"src": "http://example.com/a.png", "alt": "http://a"}),
+            ],
+        )
+        self.assertEqual(
+            node.to_html(rewrite),
+            "<p><a href='https://example.com'>x</a><img src='https://example.com/a.png' alt='http://a'></img></p>",
+        )
+
+
+class TestStreamingHTML(unittest.TestCase):
+    def build_tree(self):
+        return ParentNode(
+            "div",
+            [
+                ParentNode("p", [LeafNode(None, "Hello "), LeafNode("b", "world")]),
+                ParentNode("ul", [ParentNode("li", [LeafNode("a", "home", {"href": "/"})])]),
+            ],
+        )
+
+    def test_write_html_matches_to_html(self):
+        node = self.build_tree()
+        out = io.StringIO()
+        node.write_html(out)
+        self.assertEqual(out.getvalue(), node.to_html())
+
+    def test_iter_html_matches_to_html(self):
+        node = self.build_tree()
+        fragments = list(node.iter_html("/base/"))
+        self.assertGreater(len(fragments), 1)
+        self.assertEqual("".join(fragments), node.to_html("/base/"))
+
+    def test_iter_html_is_lazy(self):
+        node = ParentNode("div", [LeafNode("b", "ok"), ParentNode(None, [])])
+        fragments = node.iter_html()
+        self.assertEqual(next(fragments), "<div>")
+        self.assertEqual(next(fragments), "<b>ok</b>")
+        with self.assertRaises(ValueError):
+            next(fragments)
+
+
+class TestEscaping(unittest.TestCase):
+    def test_attribute_values_are_escaped(self):
+        node = LeafNode("a", "x", {"href": "/a?b=1&c='2'", "title": 'say "hi" <now>'})
+        self.assertEqual(
+            node.to_html(),
+            "<a href='/a?b=1&amp;c=&#x27;2&#x27;' title='say &quot;hi&quot; &lt;now&gt;'>x</a>",
+        )
+
+    def test_text_is_escaped(self):
+        self.assertEqual(LeafNode(None, "a < b & c > d").to_html(), "a &lt; b &amp; c &gt; d")
+        self.assertEqual(LeafNode("code", "x = '<i>'").to_html(), "<code>x = '&lt;i&gt;'</code>")
+
+    def test_rewritten_url_is_escaped(self):
+        node = LeafNode("img", "", {"src": "/it's.png", "alt": "it's"})
+        self.assertEqual(
+            node.to_html("/site/"),
+            "<img src='/site/it&#x27;s.png' alt='it&#x27;s'></img>",
+        )
+
+    def test_cached_attributes_are_per_basepath(self):
+        props = {"href": "/about"}
+        self.assertEqual(LeafNode("a", "x", props).props_to_html("/a/"), "href='/a/about'")
+        self.assertEqual(LeafNode("a", "x", props).props_to_html("/b/"), "href='/b/about'")
+        self.assertEqual(LeafNode("a", "x", props).props_to_html(), "href='/about'")
+
+
+class TestCachedHTML(unittest.TestCase):
+    def build_tree(self):
+        return ParentNode(
+            "div",
+            [
+                ParentNode("p", [LeafNode(None, "Hello "), LeafNode("b", "world")]),
+                LeafNode("a", "home", {"href": "/"}),
+            ],
+        )
+
+    def test_repeated_to_html_is_cached(self):
+        node = self.build_tree()
+        first = node.to_html("/base/")
+        second = node.to_html("/base/")
+        self.assertEqual(first, second)
+        self.assertIs(node.to_html("/base/"), second)
+        self.assertEqual(node.to_html(), "<div><p>Hello <b>world</b></p><a href='/'>home</a></div>")
+
+    def test_mutation_invalidates_ancestors(self):
+        node = self.build_tree()
+        node.to_html()
+        node.to_html()
+        node.children[0].children[1].value = "there"
+        self.assertEqual(node.to_html(), "<div><p>Hello <b>there</b></p><a href='/'>home</a></div>")
+
+        node.children[1].props = {"href": "/about"}
+        self.assertIn("href='/about'", node.to_html())
+
+        node.children = [LeafNode("i", "new")]
+        self.assertEqual(node.to_html(), "<div><i>new</i></div>")
+
+    def test_in_place_edits_invalidate(self):
+        node = self.build_tree()
+        node.to_html()
+        node.to_html()
+        node.children[0].children.append(LeafNode("i", "!"))
+        self.assertEqual(node.to_html(), "<div><p>Hello <b>world</b><i>!</i></p><a href='/'>home</a></div>")
+
+        node.children[1].props["id"] = "z"
+        self.assertIn("<a href='/' id='z'>home</a>", node.to_html())
+
+        # Children added in place are watched too
+        node.children[0].children[2].value = "?"
+        self.assertIn("<i>?</i>", node.to_html())
+
+        del node.children[0]
+        self.assertEqual(node.to_html(), "<div><a href='/' id='z'>home</a></div>")
+
+    def test_sorting_children_in_place(self):
+        node = ParentNode("ul", [LeafNode("li", "b"), LeafNode("li", "a"), LeafNode("li", "c")])
+        node.to_html()
+        node.to_html()
+        node.children.sort(key=lambda child: child.value)
+        self.assertEqual(node.to_html(), "<ul><li>a</li><li>b</li><li>c</li></ul>")
+        node.children.sort(key=lambda child: child.value, reverse=True)
+        self.assertEqual(node.to_html(), "<ul><li>c</li><li>b</li><li>a</li></ul>")
+
+    def test_mutation_only_invalidates_its_own_tree(self):
+        first = self.build_tree()
+        second = self.build_tree()
+        for node in (first, second, first, second):
+            node.to_html()
+        cached = second.to_html()
+
+        first.children[1].value = "away"
+        self.assertIn("away", first.to_html())
+        self.assertIs(second.to_html(), cached)
+
+    def test_shared_child_invalidates_every_parent(self):
+        shared = LeafNode("b", "x")
+        pages = [ParentNode("p", [shared]), ParentNode("div", [shared])]
+        for page in pages + pages:
+            page.to_html()
+        shared.value = "y"
+        self.assertEqual([page.to_html() for page in pages], ["<p><b>y</b></p>", "<div><b>y</b></div>"])
+
+    def test_frozen_tree_rejects_mutation(self):
+        node = self.build_tree().freeze()
+        self.assertIsInstance(node, ParentNode)
+        self.assertIsInstance(node.children, tuple)
+        with self.assertRaises(AttributeError):
+            node.children[0].tag = "span"
+        with self.assertRaises(TypeError):
+            node.children[1].props["href"] = "/x"
+
+    def test_frozen_subtree_renders_once(self):
+        shared = ParentNode("nav", [LeafNode("a", "home", {"href": "/"})]).freeze()
+        pages = [ParentNode("body", [shared, LeafNode("p", str(i))]) for i in range(3)]
+        html = [page.to_html("/base/") for page in pages]
+        self.assertEqual(html[2], "<body><nav><a href='/base/'>home</a></nav><p>2</p></body>")
+        self.assertEqual(shared.cache, {"/base/": "<nav><a href='/base/'>home</a></nav>"})
+
+        # Another basepath gets its own entry
+        self.assertEqual(shared.to_html("/other/"), "<nav><a href='/other/'>home</a></nav>")
+        self.assertEqual(len(shared.cache), 2)
+
 
 if __name__ == "__main__":
     unittest.main()
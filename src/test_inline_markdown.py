@@ -482,6 +482,37 @@ class TestTextToTextNodes(unittest.TestCase):
             nodes,
         )
 
+    def test_empty_text(self):
+        self.assertListEqual([], text_to_textnodes(""))
+
+    def test_delimiters_around_link(self):
+        text = "**bold** [link](https://boot.dev) `code`"
+        nodes = text_to_textnodes(text)
+        self.assertListEqual(
+            [
+                TextNode("", TextType.TEXT),
+                TextNode("bold", TextType.BOLD),
+                TextNode(" ", TextType.TEXT),
+                TextNode("link", TextType.LINK, "https://boot.dev"),
+                TextNode(" ", TextType.TEXT),
+                TextNode("code", TextType.CODE),
+                TextNode("", TextType.TEXT),
+            ],
+            nodes,
+        )
+
+    def test_delimiter_inside_link_text_is_not_split(self):
+        text = "[a_b](https://example.com/x_y)"
+        nodes = text_to_textnodes(text)
+        self.assertListEqual(
+            [TextNode("a_b", TextType.LINK, "https://example.com/x_y")],
+            nodes,
+        )
+
+    def test_unclosed_delimiter_raises(self):
+        with self.assertRaisesRegex(Exception, "Invalid Markdown!"):
+            text_to_textnodes("[link](https://boot.dev) and **broken")
+
 
 
 if __name__ == '__main__':
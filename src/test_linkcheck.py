@@ -0,0 +1,72 @@
+import os
+import shutil
+import unittest
+
+from linkcheck import LinkIndex, LINK_INDEX_NAME, internal_target
+from gencontent import generate_pages_recursive
+from sitetest import SiteTestCase, write
+
+
+class TestLinkCheck(SiteTestCase):
+    template_text = "{{ Title }}{{ Content }}"
+
+    def setUp(self):
+        super().setUp()
+        write(os.path.join(self.static, "images", "tom.png"), "png")
+        write(
+            os.path.join(self.content, "index.md"),
+            "# Home\n\n[Tom](/blog/tom/) [gone](/blog/gone) [ext](https://example.com/x)",
+        )
+        write(
+            os.path.join(self.content, "blog", "tom", "index.md"),
+            "# Tom\n\n![tom](/images/tom.png) ![missing](/images/bob.png) [up](../../#top) [self](#x)",
+        )
+
+    def build(self, link_index):
+        generate_pages_recursive(
+            self.content, self.template, self.out, "/", link_index=link_index
+        )
+        return link_index.check(self.out, self.content, self.static)
+
+    def test_reports_only_broken_internal_targets(self):
+        report = self.build(LinkIndex())
+        self.assertEqual(report["pages"], 2)
+        self.assertEqual(report["links"], 5)
+        self.assertEqual(report["images"], 2)
+        self.assertEqual(
+            sorted((entry["kind"], entry["url"]) for entry in report["broken"]),
+            [("image", "/images/bob.png"), ("link", "/blog/gone")],
+        )
+
+    def test_internal_target(self):
+        self.assertEqual(internal_target("/blog/tom/index.html#a", "/"), "/blog/tom")
+        self.assertEqual(internal_target("images/a%20b.png", "/blog/"), "/blog/images/a b.png")
+        self.assertEqual(internal_target("../", "/blog/tom/"), "/blog")
+        self.assertIsNone(internal_target("mailto:a@b.c", "/"))
+        self.assertIsNone(internal_target("//cdn.example.com/x.js", "/"))
+        self.assertIsNone(internal_target("#top", "/"))
+
+    def test_index_survives_incremental_builds(self):
+        link_index = LinkIndex.load(self.out)
+        self.build(link_index)
+        link_index.save()
+        self.assertTrue(os.path.exists(os.path.join(self.out, LINK_INDEX_NAME)))
+
+        # A later build that renders nothing still checks every page
+        loaded = LinkIndex.load(self.out)
+        self.assertEqual(len(loaded.check(self.out, self.content, self.static)["broken"]), 2)
+
+        write(os.path.join(self.content, "blog", "gone", "index.md"), "# Back")
+        self.assertEqual(len(loaded.check(self.out, self.content, self.static)["broken"]), 1)
+
+    def test_deleted_page_leaves_the_index(self):
+        link_index = LinkIndex()
+        self.build(link_index)
+        shutil.rmtree(os.path.join(self.content, "blog"))
+        report = self.build(link_index)
+        self.assertEqual(report["pages"], 1)
+        self.assertEqual([entry["url"] for entry in report["broken"]], ["/blog/tom/", "/blog/gone"])
+
+
+if __name__ == "__main__":
+    unittest.main()
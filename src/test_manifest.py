@@ -0,0 +1,118 @@
+import os
+import shutil
+import unittest
+
+from manifest import Manifest, MANIFEST_NAME
+from copystatic import copy_files_recursive
+from gencontent import generate_pages_recursive
+from sitetest import SiteTestCase, write
+
+
+class TestManifest(SiteTestCase):
+    def test_unchanged_after_save_and_load(self):
+        src = os.path.join(self.root, "a.md")
+        write(src, "# a")
+        manifest = Manifest.load(self.out)
+        self.assertFalse(manifest.is_unchanged("content:a.md", src))
+        manifest.save()
+
+        manifest = Manifest.load(self.out)
+        self.assertTrue(manifest.is_unchanged("content:a.md", src))
+
+        write(src, "# b")
+        self.assertFalse(manifest.is_unchanged("content:a.md", src))
+
+    def test_corrupt_manifest_starts_empty(self):
+        write(os.path.join(self.out, MANIFEST_NAME), "{not json")
+        manifest = Manifest.load(self.out)
+        self.assertEqual(manifest.entries, {})
+
+
+class TestIncrementalBuild(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        write(os.path.join(self.content, "index.md"), "# Home")
+        write(os.path.join(self.content, "blog", "index.md"), "# Blog")
+        write(os.path.join(self.static, "index.css"), "body {}")
+
+    def build(self, compare="hash"):
+        manifest = Manifest.load(self.out)
+        stats = copy_files_recursive(self.static, self.out, manifest, compare=compare)
+        generate_pages_recursive(self.content, self.template, self.out, "/", manifest=manifest)
+        manifest.save()
+        return stats
+
+    def mtimes(self):
+        return {
+            path: os.stat(os.path.join(self.out, path)).st_mtime_ns
+            for path in ["index.html", "blog/index.html", "index.css"]
+        }
+
+    def test_skips_unchanged_outputs(self):
+        self.build()
+        # Backdate outputs so a rewrite is visible regardless of clock resolution
+        for path in self.mtimes():
+            os.utime(os.path.join(self.out, path), ns=(0, 0))
+
+        write(os.path.join(self.content, "blog", "index.md"), "# Blog v2")
+        self.build()
+        mtimes = self.mtimes()
+        self.assertEqual(mtimes["index.html"], 0)
+        self.assertEqual(mtimes["index.css"], 0)
+        self.assertNotEqual(mtimes["blog/index.html"], 0)
+
+    def test_template_change_forces_full_render(self):
+        self.build()
+        for path in self.mtimes():
+            os.utime(os.path.join(self.out, path), ns=(0, 0))
+
+        write(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+        self.build()
+        mtimes = self.mtimes()
+        self.assertNotEqual(mtimes["index.html"], 0)
+        self.assertNotEqual(mtimes["blog/index.html"], 0)
+        self.assertEqual(mtimes["index.css"], 0)
+
+    def test_sources_sharing_an_output_render_together(self):
+        write(os.path.join(self.content, "blog", "notes.md"), "# Notes")
+        self.build()
+        with open(os.path.join(self.out, "blog", "index.html")) as file:
+            full = file.read()
+
+        # blog/index.md sorts first; on its own it would overwrite notes.md
+        write(os.path.join(self.content, "blog", "index.md"), "# Blog v2")
+        self.build()
+        with open(os.path.join(self.out, "blog", "index.html")) as file:
+            self.assertEqual(file.read(), full)
+
+    def test_removed_source_rerenders_a_shared_output(self):
+        write(os.path.join(self.content, "blog", "notes.md"), "# Notes")
+        self.build()
+        os.remove(os.path.join(self.content, "blog", "notes.md"))
+        self.build()
+        with open(os.path.join(self.out, "blog", "index.html")) as file:
+            self.assertEqual(file.read(), "<title>Blog</title><div><h1>Blog</h1></div>")
+
+    def test_removed_sources_delete_outputs(self):
+        self.build()
+        shutil.rmtree(os.path.join(self.content, "blog"))
+        os.remove(os.path.join(self.static, "index.css"))
+        self.build()
+        self.assertFalse(os.path.exists(os.path.join(self.out, "blog")))
+        self.assertFalse(os.path.exists(os.path.join(self.out, "index.css")))
+        self.assertTrue(os.path.exists(os.path.join(self.out, "index.html")))
+
+    def test_stat_compare_skips_unchanged_static(self):
+        stats = self.build(compare="stat")
+        self.assertEqual(stats["copied"], 1)
+        stats = self.build(compare="stat")
+        self.assertEqual(stats["copied"], 0)
+        self.assertEqual(stats["skipped"], 1)
+
+        write(os.path.join(self.static, "index.css"), "body { margin: 0 }")
+        stats = self.build(compare="stat")
+        self.assertEqual(stats["copied"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
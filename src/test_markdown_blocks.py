@@ -1,6 +1,8 @@
 import unittest
 from markdown_blocks import (
     markdown_to_blocks, 
+    iter_markdown_blocks,
+    blocks_to_html_node,
     block_to_block_type, 
     BlockType, 
     is_ordered_list_block, 
@@ -39,6 +41,23 @@ This is a paragraph of text. It has some **bold** and _italic_ words inside of i
         expected_blocks = ["Block one.", "Block two."]
         self.assertListEqual(markdown_to_blocks(markdown), expected_blocks)
 
+class TestIterMarkdownBlocks(unittest.TestCase):
+    def test_matches_markdown_to_blocks_for_any_chunking(self):
+        markdown = "# Title\n\n\npara one\nline two\n\n- a\n- b\n\n\n\n  tail  \n"
+        expected = markdown_to_blocks(markdown)
+        for size in range(1, len(markdown) + 1):
+            chunks = [markdown[i:i + size] for i in range(0, len(markdown), size)]
+            self.assertListEqual(list(iter_markdown_blocks(chunks)), expected)
+
+    def test_separator_split_across_chunks(self):
+        chunks = ["first\n", "\nsecond\n", "\n", "\nthird"]
+        self.assertListEqual(list(iter_markdown_blocks(chunks)), ["first", "second", "third"])
+
+    def test_blocks_to_html_node_is_lazy(self):
+        blocks = iter(["# Title", "text"])
+        node = blocks_to_html_node(blocks)
+        self.assertEqual(node.to_html(), "<div><h1>Title</h1><p>text</p></div>")
+
 class TestBlockToBlockType(unittest.TestCase):
     def test_heading_block(self):
         block = "# Heading 1"
@@ -69,6 +88,18 @@ class TestBlockToBlockType(unittest.TestCase):
         # numbers wrong => should fall back to paragraph
         self.assertEqual(block_to_block_type(block), BlockType.PARAGRAPH)
 
+    def test_seven_hashes_is_paragraph(self):
+        block = "####### too deep"
+        self.assertEqual(block_to_block_type(block), BlockType.PARAGRAPH)
+
+    def test_unclosed_code_is_paragraph(self):
+        block = "```\nprint('hi')"
+        self.assertEqual(block_to_block_type(block), BlockType.PARAGRAPH)
+
+    def test_dash_without_space_is_paragraph(self):
+        block = "-not a list"
+        self.assertEqual(block_to_block_type(block), BlockType.PARAGRAPH)
+
     def test_paragraph_fallback(self):
         block = "Just a regular paragraph.\nStill the same block."
         self.assertEqual(block_to_block_type(block), BlockType.PARAGRAPH)
@@ -95,6 +126,13 @@ class TestIsOrderedListBlock(unittest.TestCase):
         text = "1. one\nnot a list line"
         self.assertFalse(is_ordered_list_block(text))
 
+    def test_missing_space_after_number(self):
+        text = "1. one\n2.two"
+        self.assertFalse(is_ordered_list_block(text))
+
+    def test_empty_string(self):
+        self.assertFalse(is_ordered_list_block(""))
+
 class TestMarkdownTOHTMLNode(unittest.TestCase):
     def test_paragraph(self):
         md = """
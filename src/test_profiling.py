@@ -0,0 +1,85 @@
+import os
+import unittest
+from unittest import mock
+
+import profiling
+import gencontent
+import markdown_blocks
+from markdown_blocks import markdown_to_html_node
+from gencontent import generate_pages_recursive
+from sitetest import SiteTestCase, write, read
+
+
+class TestProfiler(unittest.TestCase):
+    def tearDown(self):
+        profiling.disable()
+
+    def test_disabled_by_default(self):
+        self.assertIsNone(profiling.active)
+
+    def test_enable_times_stages_and_disable_restores(self):
+        original = markdown_blocks.paragraph_to_html_node
+        profiler = profiling.enable()
+        markdown_to_html_node("# Title\n\nsome **text**\n\n- a\n- b")
+        profiling.disable()
+
+        self.assertIs(markdown_blocks.paragraph_to_html_node, original)
+        self.assertEqual(profiler.counts["block.paragraph"], 1)
+        self.assertEqual(profiler.counts["block.heading"], 1)
+        self.assertEqual(profiler.counts["block.unordered_list"], 1)
+        self.assertEqual(profiler.counts["text_to_textnodes"], 4)
+        self.assertEqual(profiler.counts["markdown_to_blocks"], 1)
+
+    def test_percentiles_and_slowest(self):
+        profiler = profiling.Profiler()
+        for i in range(1, 101):
+            profiler.add_page(f"page-{i}", 0.0, i / 1000)
+        summary = profiler.summary()
+        self.assertEqual(summary["page_ms"]["p50"], 51.0)
+        self.assertEqual(summary["page_ms"]["p99"], 99.0)
+        self.assertEqual([path for _, path in profiler.slowest(2)], ["page-100", "page-99"])
+
+    def test_trace_events(self):
+        profiler = profiling.Profiler(trace=True)
+        profiler.add("read", 1.0, 1.5)
+        self.assertEqual(profiler.events[0]["name"], "read")
+        self.assertEqual(profiler.events[0]["dur"], 500000.0)
+
+
+class TestProfiledBuild(SiteTestCase):
+    template_text = "<title>{{ Title }}</title><a href=\"/\">{{ Content }}</a>"
+
+    def setUp(self):
+        super().setUp()
+        for path, text in [("index.md", "# Home\n\n[a](/a)"), ("blog/index.md", "# Blog\n\n> q")]:
+            write(os.path.join(self.content, path), text)
+
+    def tearDown(self):
+        profiling.disable()
+
+    def read(self, out):
+        return read(os.path.join(self.root, out, "index.html"))
+
+    def test_profiled_output_matches(self):
+        generate_pages_recursive(self.content, self.template, os.path.join(self.root, "plain"), "/x/")
+        profiler = profiling.enable()
+        generate_pages_recursive(self.content, self.template, os.path.join(self.root, "profiled"), "/x/")
+        profiling.disable()
+
+        self.assertEqual(self.read("plain"), self.read("profiled"))
+        self.assertEqual(len(profiler.pages), 2)
+        for stage in ["read", "to_html", "template", "write"]:
+            self.assertEqual(profiler.counts[stage], 2)
+
+    def test_streamed_pages_are_profiled(self):
+        profiler = profiling.enable()
+        with mock.patch.object(gencontent, "STREAM_THRESHOLD", 0):
+            generate_pages_recursive(self.content, self.template, os.path.join(self.root, "profiled"), "/x/")
+        profiling.disable()
+
+        self.assertEqual(len(profiler.pages), 2)
+        self.assertEqual(profiler.counts["stream"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import os
+import json
+import shutil
+import unittest
+
+import gencontent
+from searchindex import SearchIndex, PageTerms, page_terms, term_shard
+from gencontent import generate_pages_recursive
+from htmlnode import RawNode
+from manifest import Manifest
+from sitetest import SiteTestCase, write
+
+
+class TestSearchIndex(SiteTestCase):
+    template_text = "{{ Title }}{{ Content }}"
+
+    def setUp(self):
+        super().setUp()
+        write(os.path.join(self.content, "index.md"), "# Home\n\nThe **ring** of power")
+        write(os.path.join(self.content, "tom", "index.md"), "# Tom\n\nTom has no ring, [Tom](/tom) sings")
+
+    def build(self, manifest=None, shards=4):
+        index = SearchIndex.load(self.out, "/site/", shards)
+        generate_pages_recursive(self.content, self.template, self.out, "/site/", manifest=manifest, search_index=index)
+        index.save()
+        return self.read()
+
+    def read(self):
+        search = os.path.join(self.out, "search")
+        with open(os.path.join(search, "meta.json")) as file:
+            meta = json.load(file)
+        with open(os.path.join(search, "pages.json")) as file:
+            pages = json.load(file)
+        terms = {}
+        for shard in range(meta["shards"]):
+            with open(os.path.join(search, f"index-{shard}.json")) as file:
+                for term, entries in json.load(file).items():
+                    self.assertEqual(term_shard(term, meta["shards"]), shard)
+                    terms[term] = entries
+        return pages, terms
+
+    def test_terms_and_positions(self):
+        terms = page_terms(["Tom has ", "no ring, Tom"])
+        self.assertEqual(terms, {"tom": [0, 4], "has": [1], "no": [2], "ring": [3]})
+
+        streamed = PageTerms()
+        streamed.add("Tom has ")
+        streamed.add("no ring, Tom")
+        self.assertEqual(streamed.terms, terms)
+
+    def test_cached_blocks_give_the_same_text(self):
+        node = RawNode("<p>A &amp; <b>B</b></p>", "/")
+        self.assertEqual(list(node.iter_text()), ["A & ", "B"])
+
+    def test_index_maps_terms_to_pages_with_positions(self):
+        pages, terms = self.build()
+        self.assertEqual([page["url"] for page in pages], ["/site/", "/site/tom/"])
+        self.assertEqual([page["title"] for page in pages], ["Home", "Tom"])
+        # Positions are delta-encoded
+        self.assertEqual(terms["ring"], [[0, [2]], [1, [4]]])
+        self.assertEqual(terms["tom"], [[1, [0, 1, 4]]])
+
+    def test_same_site_gives_same_files(self):
+        first = self.build()
+        shutil.rmtree(os.path.join(self.out, "search"))
+        self.assertEqual(self.build(), first)
+
+    def test_incremental_build_replaces_changed_pages(self):
+        manifest = Manifest.load(self.out)
+        self.build(manifest)
+        manifest.save()
+
+        write(os.path.join(self.content, "tom", "index.md"), "# Tom\n\nTom is merry")
+        write(os.path.join(self.content, "new", "index.md"), "# New\n\nmerry")
+        manifest = Manifest.load(self.out)
+        pages, terms = self.build(manifest)
+        self.assertEqual([page["url"] for page in pages], ["/site/", "/site/new/", "/site/tom/"])
+        self.assertEqual(terms["ring"], [[0, [2]]])
+        self.assertEqual(terms["merry"], [[1, [1]], [2, [3]]])
+
+        shutil.rmtree(os.path.join(self.content, "new"))
+        manifest = Manifest.load(self.out)
+        pages, terms = self.build(manifest)
+        self.assertEqual(len(pages), 2)
+        self.assertEqual(terms["merry"], [[1, [3]]])
+
+    def test_streamed_pages_are_indexed(self):
+        pages, expected = self.build()
+        shutil.rmtree(os.path.join(self.out, "search"))
+        threshold = gencontent.STREAM_THRESHOLD
+        gencontent.STREAM_THRESHOLD = 0
+        try:
+            self.assertEqual(self.build(), (pages, expected))
+        finally:
+            gencontent.STREAM_THRESHOLD = threshold
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+import os
+import shutil
+import unittest
+
+from shard import Shard, ShardError, shard_for, merge_shards, write_shard_manifest, load_shard_manifest
+from copystatic import copy_files_recursive
+from gencontent import generate_pages_recursive
+from searchindex import SearchIndex, SEARCH_DIR
+from sitemap import SiteIndexWriter, FEED_NAME
+from sitetest import SiteTestCase, write
+
+
+def read_tree(dir_path):
+    files = {}
+    for root, _, names in os.walk(dir_path):
+        for name in names:
+            path = os.path.join(root, name)
+            with open(path, "r") as file:
+                files[os.path.relpath(path, dir_path)] = file.read()
+    return files
+
+
+class TestShard(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        for i in range(12):
+            write(os.path.join(self.content, f"page-{i}", "index.md"), f"# Page {i}\n\n[home](/)")
+            write(os.path.join(self.static, "images", f"img-{i}.png"), f"png {i}")
+        write(os.path.join(self.content, "index.md"), "# Home")
+
+    def build(self, name, shard=None, search=False, site_url=None):
+        out = os.path.join(self.root, name)
+        os.mkdir(out)
+        copy_files_recursive(self.static, out, shard=shard)
+        search_index = SearchIndex.load(out, "/", 4) if search else None
+        site_index = SiteIndexWriter(out, site_url, "/", "Site") if site_url else None
+        generate_pages_recursive(
+            self.content, self.template, out, "/", shard=shard, search_index=search_index, site_index=site_index
+        )
+        if search_index is not None:
+            search_index.save()
+        if shard is not None:
+            write_shard_manifest(out, shard, self.content, self.static)
+        return out
+
+    def test_partition_is_stable(self):
+        self.assertEqual(shard_for("blog/tom/index.html", 7), shard_for("blog/tom/index.html", 7))
+        self.assertEqual(shard_for(os.path.join("blog", "tom"), 7), shard_for("blog/tom", 7))
+        with self.assertRaises(ValueError):
+            Shard(3, 3)
+
+    def test_shards_merge_into_the_full_site(self):
+        full = self.build("full")
+        shards = [self.build(f"shard-{i}", Shard(i, 3)) for i in range(3)]
+        merged = os.path.join(self.root, "merged")
+
+        count = merge_shards(shards, merged, self.content, self.static)
+        self.assertEqual(count, 25)
+        self.assertEqual(read_tree(merged), read_tree(full))
+
+        sizes = [len(load_shard_manifest(shard)["outputs"]) for shard in shards]
+        self.assertTrue(all(size > 0 for size in sizes))
+
+    def test_search_indexes_are_merged(self):
+        full = self.build("full", search=True)
+        shards = [self.build(f"shard-{i}", Shard(i, 3), search=True) for i in range(3)]
+        merged = os.path.join(self.root, "merged")
+        merge_shards(shards, merged, self.content, self.static)
+        self.assertEqual(read_tree(merged), read_tree(full))
+
+        # A shard built without one is an error, not a silently partial index
+        shutil.rmtree(os.path.join(shards[1], SEARCH_DIR))
+        with self.assertRaisesRegex(ShardError, "no search index"):
+            merge_shards(shards, merged, self.content, self.static)
+
+    def test_sitemaps_and_feeds_are_merged_in_walk_order(self):
+        # Two sources share blog/index.html, with a subdirectory walked
+        # between them, and the root page is walked after "blog"
+        write(os.path.join(self.content, "blog", "a.md"), "---\ndate: 2024-01-01\n---\n# A")
+        write(os.path.join(self.content, "blog", "sub", "index.md"), "# Sub")
+        write(os.path.join(self.content, "blog", "z.md"), "# Z")
+        full = self.build("full", site_url="https://example.com")
+        shards = [self.build(f"shard-{i}", Shard(i, 3), site_url="https://example.com") for i in range(3)]
+        merged = os.path.join(self.root, "merged")
+        merge_shards(shards, merged, self.content, self.static)
+        self.assertEqual(read_tree(merged), read_tree(full))
+
+        os.remove(os.path.join(shards[2], FEED_NAME))
+        with self.assertRaisesRegex(ShardError, "no sitemap"):
+            merge_shards(shards, merged, self.content, self.static)
+
+    def test_missing_shard_is_rejected(self):
+        shards = [self.build(f"shard-{i}", Shard(i, 3)) for i in range(2)]
+        merged = os.path.join(self.root, "merged")
+        with self.assertRaises(ShardError):
+            merge_shards(shards, merged, self.content, self.static)
+        self.assertFalse(os.path.exists(merged))
+
+    def test_failed_merge_keeps_the_existing_site(self):
+        site = self.build("site")
+        before = read_tree(site)
+        with self.assertRaises(ShardError):
+            merge_shards([os.path.join(self.root, "nonexistent")], site, self.content, self.static)
+        self.assertEqual(read_tree(site), before)
+        self.assertEqual(sorted(os.listdir(self.root)), ["content", "out", "site", "static", "template.html"])
+
+    def test_merge_into_one_of_the_shards(self):
+        full = self.build("full")
+        shards = [self.build(f"shard-{i}", Shard(i, 2)) for i in range(2)]
+        merge_shards(shards, shards[0], self.content, self.static)
+        self.assertEqual(read_tree(shards[0]), read_tree(full))
+
+    def test_new_page_since_the_shard_build_is_rejected(self):
+        shards = [self.build(f"shard-{i}", Shard(i, 2)) for i in range(2)]
+        write(os.path.join(self.content, "late", "index.md"), "# Late")
+        with self.assertRaisesRegex(ShardError, "not built by any shard"):
+            merge_shards(shards, os.path.join(self.root, "merged"), self.content, self.static)
+
+    def test_duplicate_shard_is_rejected(self):
+        first = self.build("a", Shard(0, 2))
+        self.build("b", Shard(1, 2))
+        with self.assertRaises(ShardError):
+            merge_shards([first, first], os.path.join(self.root, "merged"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import os
+import unittest
+
+from sitemap import SiteIndexWriter, SITEMAP_NAME, FEED_NAME
+from gencontent import generate_pages_recursive
+from manifest import Manifest
+from frontmatter import MetadataCache
+from sitetest import SiteTestCase, write, read
+
+
+class TestSiteIndex(SiteTestCase):
+    template_text = "{{ Title }}{{ Content }}"
+
+    def setUp(self):
+        super().setUp()
+        write(os.path.join(self.content, "index.md"), "# Home & away")
+        write(
+            os.path.join(self.content, "b", "index.md"),
+            "---\ndate: 2024-05-01\nsummary: About <b>\n---\n# B",
+        )
+        write(os.path.join(self.content, "a", "index.md"), "---\ndate: 2023-01-02T10:00:00\n---\n# A")
+
+    def build(self, incremental=False):
+        manifest = Manifest.load(self.out) if incremental else None
+        cache = MetadataCache.load(self.out) if incremental else None
+        site_index = SiteIndexWriter(self.out, "https://example.com/", "/docs/", "Example")
+        infos = generate_pages_recursive(
+            self.content, self.template, self.out, "/docs/", manifest=manifest,
+            metadata_cache=cache, site_index=site_index,
+        )
+        if incremental:
+            manifest.save()
+            cache.save()
+        return infos
+
+    def test_sitemap_and_feed(self):
+        self.build()
+        sitemap = read(os.path.join(self.out, SITEMAP_NAME))
+        self.assertIn("<url><loc>https://example.com/docs/a/</loc><lastmod>2023-01-02</lastmod></url>", sitemap)
+        # Walk order: a, b, then the root page
+        locs = [line.split("<loc>")[1].split("</loc>")[0] for line in sitemap.splitlines() if "<loc>" in line]
+        self.assertEqual(locs, ["https://example.com/docs/a/", "https://example.com/docs/b/", "https://example.com/docs/"])
+
+        feed = read(os.path.join(self.out, FEED_NAME))
+        self.assertIn("<title>Example</title>", feed)
+        self.assertIn("<title>Home &amp; away</title>", feed)
+        self.assertIn("<pubDate>Wed, 01 May 2024 00:00:00 +0000</pubDate>", feed)
+        self.assertIn("<description>About &lt;b&gt;</description>", feed)
+        self.assertFalse(any(name.endswith(".tmp") for name in os.listdir(self.out)))
+
+    def test_one_entry_per_output_page(self):
+        # b/index.md and b/notes.md both render to b/index.html; notes.md is
+        # walked last, so its title is the one on the page
+        write(os.path.join(self.content, "b", "notes.md"), "# Notes")
+        for incremental in (False, True, True):
+            self.build(incremental)
+            sitemap = read(os.path.join(self.out, SITEMAP_NAME))
+            feed = read(os.path.join(self.out, FEED_NAME))
+            self.assertEqual(sitemap.count("<loc>https://example.com/docs/b/</loc>"), 1)
+            self.assertEqual(feed.count("<item>"), 3)
+            self.assertIn("<title>Notes</title>", feed)
+            self.assertNotIn("<title>B</title>", feed)
+
+    def test_incremental_build_lists_skipped_pages_in_order(self):
+        self.build(incremental=True)
+        sitemap = read(os.path.join(self.out, SITEMAP_NAME))
+        feed = read(os.path.join(self.out, FEED_NAME))
+        mtime = os.stat(os.path.join(self.out, SITEMAP_NAME)).st_mtime_ns
+
+        # Nothing rendered, nothing rewritten
+        self.assertEqual(self.build(incremental=True), [])
+        self.assertEqual(read(os.path.join(self.out, SITEMAP_NAME)), sitemap)
+        self.assertEqual(os.stat(os.path.join(self.out, SITEMAP_NAME)).st_mtime_ns, mtime)
+
+        # Only the changed entry differs
+        write(os.path.join(self.content, "b", "index.md"), "---\ndate: 2024-05-01\n---\n# B2")
+        infos = self.build(incremental=True)
+        self.assertEqual([info["title"] for info in infos], ["B2"])
+        self.assertEqual(read(os.path.join(self.out, SITEMAP_NAME)), sitemap)
+        self.assertEqual(read(os.path.join(self.out, FEED_NAME)).count("\n"), feed.count("\n"))
+        self.assertIn("<title>B2</title>", read(os.path.join(self.out, FEED_NAME)))
+
+    def test_failed_build_leaves_no_partial_files(self):
+        write(os.path.join(self.content, "c", "index.md"), "no title")
+        with self.assertRaises(ValueError):
+            self.build()
+        self.assertEqual(sorted(name for name in os.listdir(self.out) if name.endswith((".xml", ".tmp"))), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+
+from template import Template
+from htmlnode import LeafNode, ParentNode
+
+
+class TestTemplate(unittest.TestCase):
+    def test_render(self):
+        template = Template("<title>{{ Title }}</title><body>{{ Content }}</body>")
+        node = ParentNode("div", [LeafNode("b", "hi")])
+        self.assertEqual(
+            template.render("Home", node),
+            "<title>Home</title><body><div><b>hi</b></div></body>",
+        )
+
+    def test_title_is_escaped(self):
+        template = Template("<title>{{ Title }}</title>{{ Content }}")
+        node = LeafNode("h1", "Fish & <Chips>")
+        expected = "<title>Fish &amp; &lt;Chips&gt;</title><h1>Fish &amp; &lt;Chips&gt;</h1>"
+        self.assertEqual(template.render("Fish & <Chips>", node), expected)
+        self.assertEqual(template.fill("Fish & <Chips>", node.to_html()), expected)
+
+    def test_basepath_rewrites_literals(self):
+        template = Template(
+            "<link href=\"/index.css\"><script src='/app.js'></script>{{ Content }}",
+            "/site/",
+        )
+        self.assertEqual(
+            template.literals,
+            ["<link href=\"/site/index.css\"><script src='/site/app.js'></script>", ""],
+        )
+        self.assertEqual(template.slots, ["Content"])
+
+    def test_basepath_rewrites_content_props(self):
+        template = Template("{{ Content }}", "/site/")
+        node = ParentNode(
+            "p",
+            [
+                LeafNode("a", "home", {"href": "/blog"}),
+                LeafNode("a", "out", {"href": "https://example.com"}),
+                LeafNode("img", "", {"src": "/images/a.png", "alt": "/a"}),
+            ],
+        )
+        self.assertEqual(
+            template.render("", node),
+            "<p><a href='/site/blog'>home</a><a href='https://example.com'>out</a>"
+            "<img src='/site/images/a.png' alt='/a'></img></p>",
+        )
+
+    def test_basepath_skips_protocol_relative_literals(self):
+        template = Template("<script src=\"//cdn.example.com/a.js\"></script>", "/site/")
+        self.assertEqual(template.literals, ["<script src=\"//cdn.example.com/a.js\"></script>"])
+
+    def test_unknown_placeholder_is_literal(self):
+        template = Template("{{ Other }}{{ Title }}")
+        self.assertEqual(template.render("T", LeafNode(None, "")), "{{ Other }}T")
+
+
+if __name__ == "__main__":
+    unittest.main()
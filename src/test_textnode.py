@@ -13,6 +13,14 @@ class TestTextNode(unittest.TestCase):
         node2 = TextNode("This is a bold text node", TextType.BOLD)
         self.assertNotEqual(node, node2)
 
+    def test_repr(self):
+        node = TextNode("link", TextType.LINK, "https://boot.dev")
+        self.assertEqual(repr(node), "TextNode(link, link, https://boot.dev)")
+
+    def test_slots_no_instance_dict(self):
+        node = TextNode("compact", TextType.TEXT)
+        self.assertFalse(hasattr(node, "__dict__"))
+
 class TestTextNodeToHTMLNode(unittest.TestCase):
     def test_text(self):
         node = TextNode("This is a text node", TextType.TEXT)
@@ -0,0 +1,99 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from gencontent import generate_pages_recursive
+from copystatic import copy_files_recursive
+from watch import SiteWatcher, Inotify
+from sitetest import SiteTestCase, write
+
+
+class TestSiteWatcher(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        write(os.path.join(self.content, "index.md"), "# Home")
+        write(os.path.join(self.content, "blog", "index.md"), "# Blog")
+        write(os.path.join(self.static, "index.css"), "body {}")
+        copy_files_recursive(self.static, self.out)
+        generate_pages_recursive(self.content, self.template, self.out, "/")
+        self.watcher = SiteWatcher(self.content, self.static, self.template, self.out, "/")
+
+    def read(self, rel_path):
+        with open(os.path.join(self.out, rel_path)) as file:
+            return file.read()
+
+    def test_no_changes(self):
+        self.assertEqual(self.watcher.poll(), [])
+
+    def test_rerenders_only_changed_page(self):
+        write(os.path.join(self.content, "blog", "index.md"), "# Blog v2")
+        rebuilt = self.watcher.poll()
+        self.assertEqual(rebuilt, [os.path.join(self.out, "blog", "index.html")])
+        self.assertIn("Blog v2", self.read("blog/index.html"))
+
+    def test_new_and_removed_pages(self):
+        write(os.path.join(self.content, "about", "index.md"), "# About")
+        shutil.rmtree(os.path.join(self.content, "blog"))
+        self.watcher.poll()
+        self.assertIn("About", self.read("about/index.html"))
+        self.assertFalse(os.path.exists(os.path.join(self.out, "blog")))
+
+    def test_template_change_rerenders_all(self):
+        write(self.template, "<h1>{{ Title }}</h1>{{ Content }}!")
+        rebuilt = self.watcher.poll()
+        self.assertEqual(len(rebuilt), 2)
+        self.assertTrue(self.read("index.html").startswith("<h1>Home</h1>"))
+
+    def test_static_change(self):
+        write(os.path.join(self.static, "index.css"), "body { margin: 0 }")
+        self.watcher.poll()
+        self.assertEqual(self.read("index.css"), "body { margin: 0 }")
+
+    def test_render_error_keeps_watching(self):
+        write(os.path.join(self.content, "index.md"), "no title")
+        self.assertEqual(self.watcher.poll(), [])
+        write(os.path.join(self.content, "index.md"), "# Fixed title")
+        self.watcher.poll()
+        self.assertIn("Fixed title", self.read("index.html"))
+
+    def test_refresh_only_looks_at_given_paths(self):
+        write(os.path.join(self.content, "index.md"), "# Home v2")
+        write(os.path.join(self.content, "blog", "index.md"), "# Blog v2")
+        rebuilt = self.watcher.refresh([os.path.join(self.content, "index.md")])
+        self.assertEqual(rebuilt, [os.path.join(self.out, "index.html")])
+        self.assertIn("Blog</title>", self.read("blog/index.html"))
+
+    def test_refresh_new_directory(self):
+        write(os.path.join(self.content, "docs", "a", "index.md"), "# A")
+        self.watcher.refresh([os.path.join(self.content, "docs")])
+        self.assertIn("<title>A</title>", self.read("docs/a/index.html"))
+
+
+class TestInotify(unittest.TestCase):
+    def setUp(self):
+        try:
+            self.inotify = Inotify()
+        except OSError as e:
+            self.skipTest(str(e))
+        self.root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        self.inotify.close()
+        shutil.rmtree(self.root)
+
+    def test_reports_written_and_nested_files(self):
+        self.inotify.add_tree(self.root)
+        path = os.path.join(self.root, "index.md")
+        write(path, "# Hi")
+        self.assertIn(path, self.inotify.read(1))
+
+        nested = os.path.join(self.root, "blog")
+        os.mkdir(nested)
+        self.assertIn(nested, self.inotify.read(1))
+        write(os.path.join(nested, "index.md"), "# Blog")
+        self.assertIn(os.path.join(nested, "index.md"), self.inotify.read(1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,237 @@
+import os
+import sys
+import time
+import struct
+import select
+import ctypes
+import ctypes.util
+import threading
+import functools
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from copystatic import place_file
+from gencontent import generate_page
+from manifest import remove_empty_dirs
+from template import Template
+
+def scan_tree(dir_path):
+    # {path: (mtime_ns, size)} for every file below dir_path
+    found = {}
+    stack = [dir_path]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    stack.append(entry.path)
+                else:
+                    stat = entry.stat()
+                    found[entry.path] = (stat.st_mtime_ns, stat.st_size)
+    return found
+
+def update_tree(tree, path):
+    prefix = path + os.sep
+    for known in [known for known in tree if known == path or known.startswith(prefix)]:
+        del tree[known]
+
+    if os.path.isdir(path):
+        tree.update(scan_tree(path))
+    elif os.path.isfile(path):
+        stat = os.stat(path)
+        tree[path] = (stat.st_mtime_ns, stat.st_size)
+
+def is_within(path, dir_path):
+    return os.path.commonpath([os.path.abspath(path), os.path.abspath(dir_path)]) == os.path.abspath(dir_path)
+
+def diff_trees(old, new):
+    changed = [path for path, stamp in new.items() if old.get(path) != stamp]
+    removed = [path for path in old if path not in new]
+    return changed, removed
+
+IN_MODIFY = 0x002
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct("iIII")
+
+class Inotify:
+    # Minimal ctypes binding, so a change is noticed without rescanning
+    # every file; callers fall back to polling when it is unavailable
+    def __init__(self):
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.dirs = {}
+
+    def add_tree(self, dir_path):
+        self.add_dir(dir_path)
+        for root, dirs, _ in os.walk(dir_path):
+            for name in dirs:
+                self.add_dir(os.path.join(root, name))
+
+    def add_dir(self, dir_path):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(dir_path), WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {dir_path}")
+        self.dirs[wd] = dir_path
+
+    def read(self, timeout):
+        # Returns the paths touched since the last read; new directories are
+        # watched straight away so their files are seen too
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+
+        paths = set()
+        while True:
+            try:
+                data = os.read(self.fd, 1 << 16)
+            except BlockingIOError:
+                return paths
+
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b"\0")
+                offset += length
+                dir_path = self.dirs.get(wd)
+                if dir_path is None or not name:
+                    continue
+
+                path = os.path.join(dir_path, os.fsdecode(name))
+                if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                    self.add_tree(path)
+                paths.add(path)
+
+    def close(self):
+        os.close(self.fd)
+
+class SiteWatcher:
+    def __init__(self, content_dir, static_dir, template_path, dest_dir, basepath):
+        self.content_dir = content_dir
+        self.static_dir = static_dir
+        self.template_path = template_path
+        self.dest_dir = dest_dir
+        self.basepath = basepath
+        self.template = Template.load(template_path, basepath)
+        self.template_stamp = self.stamp(template_path)
+        self.content = scan_tree(content_dir)
+        self.static = scan_tree(static_dir)
+
+    def stamp(self, path):
+        stat = os.stat(path)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def page_dest_path(self, from_path):
+        rel_dir = os.path.relpath(os.path.dirname(from_path), self.content_dir)
+        return os.path.normpath(os.path.join(self.dest_dir, rel_dir, "index.html"))
+
+    def static_dest_path(self, from_path):
+        return os.path.join(self.dest_dir, os.path.relpath(from_path, self.static_dir))
+
+    def poll(self):
+        content = scan_tree(self.content_dir)
+        static = scan_tree(self.static_dir)
+        template_changed = self.stamp(self.template_path) != self.template_stamp
+        return self.apply(content, static, template_changed)
+
+    def refresh(self, paths):
+        # Like poll(), but only re-stats the given paths (from inotify)
+        content = dict(self.content)
+        static = dict(self.static)
+        template_changed = False
+        for path in paths:
+            if os.path.abspath(path) == os.path.abspath(self.template_path):
+                # Editors that save by rename leave the template briefly missing
+                if os.path.exists(self.template_path):
+                    template_changed = self.stamp(self.template_path) != self.template_stamp
+            elif is_within(path, self.content_dir):
+                update_tree(content, path)
+            elif is_within(path, self.static_dir):
+                update_tree(static, path)
+        return self.apply(content, static, template_changed)
+
+    def apply(self, content, static, template_changed):
+        rebuilt = []
+        changed, removed = diff_trees(self.content, content)
+
+        if template_changed:
+            # The parsed template is kept between rebuilds and only reloaded here
+            self.template = Template.load(self.template_path, self.basepath)
+            self.template_stamp = self.stamp(self.template_path)
+            changed = list(content)
+
+        for from_path in changed:
+            dest_path = self.page_dest_path(from_path)
+            try:
+                generate_page(from_path, self.template_path, dest_path, self.basepath, self.template)
+            except Exception as e:
+                print(f"error: {from_path}: {e}")
+                continue
+            rebuilt.append(dest_path)
+
+        for from_path in removed:
+            rebuilt.append(self.remove_output(self.page_dest_path(from_path)))
+        self.content = content
+
+        changed, removed = diff_trees(self.static, static)
+        for from_path in changed:
+            dest_path = self.static_dest_path(from_path)
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            place_file(from_path, dest_path, "copy")
+            rebuilt.append(dest_path)
+
+        for from_path in removed:
+            rebuilt.append(self.remove_output(self.static_dest_path(from_path)))
+        self.static = static
+
+        return rebuilt
+
+    def remove_output(self, dest_path):
+        if os.path.isfile(dest_path):
+            os.remove(dest_path)
+            remove_empty_dirs(os.path.dirname(dest_path), self.dest_dir)
+        return dest_path
+
+    def run(self, interval=0.5):
+        try:
+            inotify = Inotify()
+            inotify.add_tree(self.content_dir)
+            inotify.add_tree(self.static_dir)
+            inotify.add_dir(os.path.dirname(self.template_path) or ".")
+        except OSError as e:
+            print(f"inotify unavailable ({e}), polling every {interval}s")
+            inotify = None
+
+        while True:
+            if inotify is not None:
+                paths = inotify.read(None)
+                # Let an editor finish its burst of writes before rebuilding
+                paths |= inotify.read(0.005)
+                start = time.perf_counter()
+                rebuilt = self.refresh(paths)
+            else:
+                time.sleep(interval)
+                start = time.perf_counter()
+                rebuilt = self.poll()
+
+            if rebuilt:
+                elapsed = (time.perf_counter() - start) * 1000
+                print(f"rebuilt {len(rebuilt)} file(s) in {elapsed:.1f} ms")
+
+def serve(dir_path, port):
+    handler = functools.partial(SimpleHTTPRequestHandler, directory=dir_path)
+    server = ThreadingHTTPServer(("", port), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    print(f"Serving {dir_path} at http://localhost:{port}/")
+    return server